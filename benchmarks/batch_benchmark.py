@@ -0,0 +1,75 @@
+# coding=utf-8
+"""Playouts per second of MCTSWithDNN with leaf batching.
+
+Uses SimpleCNN when tensorflow is available. Otherwise a numpy network
+of one dense layer stands in, with a fixed cost per call (call_cost_ms)
+to model the session.run overhead that batching amortizes.
+
+Usage:
+    python benchmarks/batch_benchmark.py [num_playouts] [board_size] [call_cost_ms]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+from pygomoku.mcts.MCTS import MCTSWithDNN
+
+
+class DenseNetwork(object):
+    def __init__(self, height, width, call_cost):
+        rng = np.random.RandomState(0)
+        self.weights = rng.randn(4 * height * width, height * width + 1).astype(np.float32) * 0.01
+        self.call_cost = call_cost
+
+    def getPolicyValue(self, state_batch):
+        deadline = time.perf_counter() + self.call_cost
+        out = state_batch.reshape(state_batch.shape[0], -1).dot(self.weights)
+        policy = np.exp(out[:, :-1])
+        policy /= policy.sum(axis=1, keepdims=True)
+        while time.perf_counter() < deadline:
+            pass
+        return policy, np.tanh(out[:, -1:])
+
+    def policyValueFunc(self, board):
+        policy, value = self.getPolicyValue(board.currentState(np.float32)[np.newaxis])
+        legal_mask = board.legal_mask
+        return zip(np.flatnonzero(legal_mask).tolist(), policy[0][legal_mask]), value[0][0]
+
+    def policyValueBatchFunc(self, state_batch, move_lists, renormalize=False):
+        policy_vecs, values = self.getPolicyValue(state_batch)
+        return [list(zip(moves, policy_vec[moves])) for policy_vec, moves
+                in zip(policy_vecs, move_lists)], values[:, 0]
+
+
+def main():
+    num_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    call_cost = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 1e-3
+    try:
+        from pygomoku.mcts.Networks import SimpleCNN
+        network = SimpleCNN(size, size)
+        print("SimpleCNN")
+    except (ImportError, AttributeError):
+        network = DenseNetwork(size, size, call_cost)
+        print("numpy stand-in network, {:.1f} ms per call".format(call_cost * 1000))
+
+    board = Board(width=size, height=size)
+    board.play(size * size // 2)
+    print("{} playouts on {}x{}".format(num_playouts, size, size))
+    for batch_size in (1, 8, 16, 32):
+        search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=num_playouts,
+                                  expand_bound=1, silent=True, batch_size=batch_size,
+                                  policy_value_batch_fn=network.policyValueBatchFunc)
+        start = time.perf_counter()
+        search_tree.getMove(board, 1.0)
+        elapsed = time.perf_counter() - start
+        print("batch size {:3d}: {:8.0f} playouts/s".format(batch_size, num_playouts / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# coding=utf-8
+"""Throughput of Board.play / Board.gameEnd / Board.undo.
+
+Board is compared with DictBoard, a reference copy of the old engine
+that keeps stones in a dict and walks it to find a winner.
+
+Usage:
+    python benchmarks/board_benchmark.py [num_games] [board_size]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+
+
+class DictBoard(object):
+    """The dict based board engine, kept here as the benchmark baseline.
+    """
+    def __init__(self, width=15, height=15, numberToWin=5):
+        self.width = width
+        self.height = height
+        self.numberToWin = numberToWin
+        self.current_player = Board.kPlayerBlack
+        self.availables = list(range(width * height))
+        self.moved = []
+        self.states = {}
+        self.last_move = None
+
+    def play(self, move):
+        if move in self.moved:
+            return False
+        self.states[move] = self.current_player
+        self.availables.remove(move)
+        self.moved.append(move)
+        self.current_player = 1 - self.current_player
+        self.last_move = move
+        return True
+
+    def undo(self):
+        if not self.moved:
+            return False
+        del self.states[self.last_move]
+        self.availables.append(self.last_move)
+        self.moved = self.moved[:-1]
+        self.current_player = 1 - self.current_player
+        self.last_move = self.moved[-1] if self.moved else None
+        return True
+
+    def fastGetWinner(self):
+        if len(self.moved) < 2*self.numberToWin-1:
+            return None
+        width = self.width
+        move = self.last_move
+        player = self.states[move]
+        # (step, column the walk must not cross going backward/forward)
+        for step, stop_back, stop_fwd in ((1, 0, 0),
+                                          (width, None, None),
+                                          (width + 1, 0, 0),
+                                          (width - 1, width - 1, width - 1)):
+            count = 1
+            pos = move
+            while (stop_back is None or pos % width != stop_back) and \
+                    self.states.get(pos - step, Board.kEmpty) == player:
+                pos -= step
+                count += 1
+            pos = move + step
+            while (stop_fwd is None or pos % width != stop_fwd) and \
+                    self.states.get(pos, Board.kEmpty) == player:
+                pos += step
+                count += 1
+            if count >= self.numberToWin:
+                return player
+        return None
+
+    def gameEnd(self):
+        winner = self.fastGetWinner()
+        if winner is not None:
+            return True, winner
+        elif not self.availables:
+            return True, None
+        else:
+            return False, None
+
+
+def randomGames(num_games, size):
+    """Random move sequences, each cut at the move that ends the game.
+    """
+    games = []
+    for _ in range(num_games):
+        board = Board(width=size, height=size)
+        moves = []
+        for move in np.random.permutation(size * size).tolist():
+            board.play(move)
+            moves.append(move)
+            if board.gameEnd()[0]:
+                break
+        games.append(moves)
+    return games
+
+
+def benchmark(board_cls, games, size):
+    play_time = end_time = undo_time = 0.0
+    for moves in games:
+        board = board_cls(width=size, height=size)
+        start = time.perf_counter()
+        for move in moves:
+            board.play(move)
+        game_play_time = time.perf_counter() - start
+        play_time += game_play_time
+
+        start = time.perf_counter()
+        for _ in moves:
+            board.undo()
+        undo_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for move in moves:
+            board.play(move)
+            board.gameEnd()
+        end_time += time.perf_counter() - start - game_play_time
+    return play_time, end_time, undo_time
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    np.random.seed(0)
+    games = randomGames(num_games, size)
+    num_moves = sum(len(moves) for moves in games)
+    print("{} random games on {}x{}, {} moves in total".format(
+        num_games, size, size, num_moves))
+    print("{:<10}{:>16}{:>16}{:>16}".format(
+        "board", "play/s", "gameEnd/s", "undo/s"))
+    for name, board_cls in (("dict", DictBoard), ("board", Board)):
+        play_time, end_time, undo_time = benchmark(board_cls, games, size)
+        print("{:<10}{:>16.0f}{:>16.0f}{:>16.0f}".format(
+            name, num_moves / play_time, num_moves / end_time, num_moves / undo_time))
+
+
+if __name__ == '__main__':
+    main()
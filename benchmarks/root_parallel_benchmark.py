@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Root parallel pure MCTS against single process MCTS at equal wall-clock time.
+
+The parallel player runs compute_budget playouts in each of num_workers
+processes. The budget of the single process player is calibrated so one
+of its moves takes as long as one parallel move, then the two play
+num_games games, switching colors every game.
+
+The parallel player only gains with one core per worker. Results so far:
+
+    single core, 100 games, 9x9, 2 workers x 500 playouts (1.56s per move)
+    vs single process with 1172 playouts:
+    parallel score 32.0/100, win rate 0.32 +- 0.05, Elo difference -131
+
+With one core the workers share it, so each tree gets half the time, and
+this run only shows what the parallel search costs. The equal wall-clock
+comparison the search is meant for, on one core per worker, has not been
+run yet (no multi-core machine was available).
+
+Usage:
+    python benchmarks/root_parallel_benchmark.py [num_games] [board_size] [compute_budget] [num_workers]
+"""
+from __future__ import print_function
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+from pygomoku.GameServer import GameServer
+from pygomoku.Player import PureMCTSPlayer
+
+
+def timeMove(player, size):
+    board = Board(width=size, height=size)
+    board.initBoard(Board.kPlayerBlack)
+    for move in (size * size // 2, size * size // 2 + 1):
+        board.play(move)
+    player.color = board.current_player
+    player.reset()
+    start = time.perf_counter()
+    player.getAction(board)
+    return time.perf_counter() - start
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    compute_budget = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+    num_workers = int(sys.argv[4]) if len(sys.argv) > 4 else 4
+    np.random.seed(0)
+
+    parallel = PureMCTSPlayer(Board.kPlayerBlack, name="parallel", compute_budget=compute_budget,
+                              silent=True, num_workers=num_workers)
+    single = PureMCTSPlayer(Board.kPlayerWhite, name="single", compute_budget=compute_budget, silent=True)
+    timeMove(parallel, size)  # start the workers
+    parallel_time = timeMove(parallel, size)
+    single_time = timeMove(single, size)
+    single_budget = max(int(compute_budget * parallel_time / single_time), 1)
+    single = PureMCTSPlayer(Board.kPlayerWhite, name="single", compute_budget=single_budget, silent=True)
+    print("{} cores, {} workers x {} playouts ({:.2f}s per move) "
+          "vs single process with {} playouts".format(
+              os.cpu_count(), num_workers, compute_budget, parallel_time, single_budget))
+
+    score = 0.0
+    for game in range(num_games):
+        if game % 2:
+            parallel.color, single.color = Board.kPlayerWhite, Board.kPlayerBlack
+            player1, player2 = single, parallel
+        else:
+            parallel.color, single.color = Board.kPlayerBlack, Board.kPlayerWhite
+            player1, player2 = parallel, single
+        parallel.reset()
+        single.reset()
+        board = Board(width=size, height=size)
+        winner = GameServer(board, GameServer.kNormalPlayGame, player1, player2, silent=True).startGame()
+        if winner is None:
+            score += 0.5
+        elif winner == parallel.color:
+            score += 1.0
+    parallel.close()
+
+    win_rate = score / num_games
+    stderr = math.sqrt(max(win_rate * (1 - win_rate), 1e-12) / num_games)
+    clipped = min(max(win_rate, 1e-3), 1 - 1e-3)
+    print("parallel score {:.1f}/{}: win rate {:.2f} +- {:.2f}, Elo difference {:+.0f}".format(
+        score, num_games, win_rate, stderr, -400 * math.log10(1 / clipped - 1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# coding=utf-8
+"""Scaling of TreeParallelMCTS over 1/2/4/8 threads.
+
+Uses SimpleCNN when tensorflow is available. Otherwise the numpy
+stand-in network of batch_benchmark.py is used, sleeping for its call
+cost (call_cost_ms) instead of spinning, since session.run releases the
+GIL while the network runs.
+
+Usage:
+    python benchmarks/thread_benchmark.py [num_playouts] [board_size] [call_cost_ms]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+from pygomoku.mcts.ParallelMCTS import TreeParallelMCTS
+from batch_benchmark import DenseNetwork
+
+
+class SleepingNetwork(DenseNetwork):
+    def getPolicyValue(self, state_batch):
+        out = state_batch.reshape(state_batch.shape[0], -1).dot(self.weights)
+        policy = np.exp(out[:, :-1])
+        policy /= policy.sum(axis=1, keepdims=True)
+        time.sleep(self.call_cost)
+        return policy, np.tanh(out[:, -1:])
+
+
+def main():
+    num_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    call_cost = float(sys.argv[3]) / 1000 if len(sys.argv) > 3 else 2e-3
+    try:
+        from pygomoku.mcts.Networks import SimpleCNN
+        network = SimpleCNN(size, size)
+        print("SimpleCNN")
+    except (ImportError, AttributeError):
+        network = SleepingNetwork(size, size, call_cost)
+        print("numpy stand-in network, {:.1f} ms per call".format(call_cost * 1000))
+
+    board = Board(width=size, height=size)
+    board.play(size * size // 2)
+    print("{} playouts on {}x{}, {} cores".format(num_playouts, size, size, os.cpu_count()))
+    base = None
+    for num_threads in (1, 2, 4, 8):
+        search_tree = TreeParallelMCTS(network.policyValueFunc, compute_budget=num_playouts,
+                                       expand_bound=1, silent=True, num_threads=num_threads)
+        start = time.perf_counter()
+        search_tree.getMove(board, 1.0)
+        rate = num_playouts / (time.perf_counter() - start)
+        base = base or rate
+        print("{} threads: {:8.0f} playouts/s  (x{:.2f})".format(num_threads, rate, rate / base))
+
+
+if __name__ == '__main__':
+    main()
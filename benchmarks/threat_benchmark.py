@@ -0,0 +1,67 @@
+# coding=utf-8
+"""Cost of the incremental pattern counts behind Board.threats.
+
+Reports the play+undo cost with and without trackThreats, i.e. the
+update cost of the pattern counts, and the cost of a threats query and
+of scoring it.
+
+Usage:
+    python benchmarks/threat_benchmark.py [num_games] [board_size]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+from pygomoku.Pattern import scoreThreats
+
+
+def playUndo(board, games):
+    start = time.perf_counter()
+    for moves in games:
+        for move in moves:
+            board.play(move)
+        for _ in moves:
+            board.undo()
+    return time.perf_counter() - start
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    np.random.seed(0)
+    games = [np.random.permutation(size * size)[:size * size // 2].tolist()
+             for _ in range(num_games)]
+    num_moves = sum(len(moves) for moves in games)
+
+    plain_time = playUndo(Board(width=size, height=size), games)
+    board = Board(width=size, height=size, trackThreats=True)
+    threat_time = playUndo(board, games)
+
+    for move in games[0]:
+        board.play(move)
+    num_queries = 100000
+    start = time.perf_counter()
+    for _ in range(num_queries):
+        board.threats(Board.kPlayerBlack)
+    query_time = time.perf_counter() - start
+    counts = board.threats(Board.kPlayerBlack)
+    start = time.perf_counter()
+    for _ in range(num_queries):
+        scoreThreats(counts)
+    score_time = time.perf_counter() - start
+
+    print("{} play+undo cycles on {}x{}".format(num_moves, size, size))
+    print("play+undo:                 {:.2f} us".format(plain_time / num_moves * 1e6))
+    print("play+undo, trackThreats:   {:.2f} us".format(threat_time / num_moves * 1e6))
+    print("pattern update per move:   {:.2f} us".format((threat_time - plain_time) / num_moves / 2 * 1e6))
+    print("threats query:             {:.2f} us".format(query_time / num_queries * 1e6))
+    print("scoreThreats:              {:.2f} us".format(score_time / num_queries * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# coding=utf-8
+"""Playouts per second and memory of the MCTS tree backends.
+
+MCTSWithDNN is run with a cheap uniform policy-value function instead of
+a network, so the time is spent in the tree (select, expand, backup) and
+on the board. Memory is the peak traced by tracemalloc during a second,
+traced run of the same search.
+
+Usage:
+    python benchmarks/tree_benchmark.py [num_playouts] [board_size]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board
+from pygomoku.mcts.MCTS import MCTSWithDNN
+
+
+def uniformPolicyValue(board):
+    moves = np.flatnonzero(board.legal_mask).tolist()
+    return zip(moves, np.ones(len(moves)) / len(moves)), 0.0
+
+
+def search(tree_backend, num_playouts, size):
+    board = Board(width=size, height=size)
+    board.play(size * size // 2)
+    search_tree = MCTSWithDNN(uniformPolicyValue, compute_budget=num_playouts,
+                              expand_bound=1, silent=True, tree_backend=tree_backend)
+    start = time.perf_counter()
+    search_tree.getMove(board, 1.0)
+    return time.perf_counter() - start
+
+
+def main():
+    num_playouts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    print("{} playouts on {}x{}".format(num_playouts, size, size))
+    for tree_backend in ("node", "array"):
+        elapsed = search(tree_backend, num_playouts, size)
+        tracemalloc.start()
+        search(tree_backend, num_playouts, size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print("{:6s} {:8.0f} playouts/s   peak memory {:8.1f} MB".format(
+            tree_backend, num_playouts / elapsed, peak / 2.0**20))
+
+
+if __name__ == '__main__':
+    main()
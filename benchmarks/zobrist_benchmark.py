@@ -0,0 +1,71 @@
+# coding=utf-8
+"""Overhead of the incremental Zobrist hash on Board.play / Board.undo.
+
+The cost of a full play+undo cycle is compared with the cost of the two
+hash updates it contains. Those are replayed on a plain object with the
+same keys and attribute accesses, with and without the xor, so the
+difference is what the hash adds to Board.
+
+Usage:
+    python benchmarks/zobrist_benchmark.py [num_games] [board_size]
+"""
+from __future__ import print_function
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from pygomoku.Board import Board, _getZobristTable
+
+
+class HashState(object):
+    def __init__(self, num_moves):
+        self.keys, self.side, _ = _getZobristTable(num_moves, 0)
+        self.player = Board.kPlayerBlack
+        self.hash = self.side
+
+
+def replay(games, state, with_hash):
+    start = time.perf_counter()
+    for moves in games:
+        for move in moves:
+            if with_hash:
+                state.hash ^= state.keys[state.player][move]
+            state.player = 1 - state.player
+        for move in reversed(moves):
+            state.player = 1 - state.player
+            if with_hash:
+                state.hash ^= state.keys[state.player][move]
+    return time.perf_counter() - start
+
+
+def main():
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    np.random.seed(0)
+    games = [np.random.permutation(size * size)[:size * size // 2].tolist()
+             for _ in range(num_games)]
+    num_moves = sum(len(moves) for moves in games)
+
+    board = Board(width=size, height=size)
+    start = time.perf_counter()
+    for moves in games:
+        for move in moves:
+            board.play(move)
+        for _ in moves:
+            board.undo()
+    board_time = time.perf_counter() - start
+
+    state = HashState(size * size)
+    hash_time = replay(games, state, True) - replay(games, state, False)
+
+    print("{} play+undo cycles on {}x{}".format(num_moves, size, size))
+    print("Board play+undo: {:.0f} ns".format(board_time / num_moves * 1e9))
+    print("hash updates:    {:.0f} ns ({:.1f}% of play+undo)".format(
+        hash_time / num_moves * 1e9, 100.0 * hash_time / board_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -14,3 +14,4 @@ player2 = HumanPlayer(Board.kPlayerWhite, name="player 2")
 
 server = GameServer(board, GameServer.kNormalPlayGame, player1, player2)
 server.startGame()
+player1.close()
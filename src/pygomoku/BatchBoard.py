@@ -0,0 +1,289 @@
+# coding=utf-8
+from __future__ import print_function
+import numpy as np
+
+from pygomoku.Board import Board
+
+
+def _hasLine(stones, number_to_win):
+    """Find the boards holding numberToWin stones in a line.
+
+    Every window of number_to_win cells along the four directions is
+    AND-ed together with shifted slices, so all boards are checked at once.
+
+    Args:
+        stones: A boolean array with shape (N, height, width).
+        number_to_win: How many stones need on a line to win.
+
+    Return:
+        A boolean array with shape (N,).
+    """
+    n = number_to_win
+    _, height, width = stones.shape
+    found = np.zeros(stones.shape[0], dtype=bool)
+    # cell k of a window, one slice per direction:
+    # horizontal, vertical, main diagonal and deputy diagonal
+    directions = [
+        lambda k: stones[:, :, k:width - n + 1 + k],
+        lambda k: stones[:, k:height - n + 1 + k, :],
+        lambda k: stones[:, k:height - n + 1 + k, k:width - n + 1 + k],
+        lambda k: stones[:, k:height - n + 1 + k, n - 1 - k:width - k],
+    ]
+    for window in directions:
+        line = window(0).copy()
+        if line.size == 0:
+            continue
+        for k in range(1, n):
+            line &= window(k)
+        found |= line.reshape(line.shape[0], -1).any(axis=1)
+    return found
+
+
+def labelWinners(positions, number_to_win=5, current_player=None):
+    """Find the winner of many stored positions at once.
+
+    Args:
+        positions: Either stones, an int array with shape (N, height, width)
+            holding the color of every stone and Board.kEmpty elsewhere,
+            as BatchBoard.stones, or the stacked planes of
+            Board.currentState with shape (N, 4, height, width).
+        number_to_win: How many stones need on a line to win.
+        current_player: An int array with shape (N,), the player to play.
+            Only used to settle positions where both players have a line
+            (the player who moved last wins, as in Board.getWinner). Read
+            from the planes when given planes, otherwise the player with
+            fewer stones is taken as the player to play, black on a tie.
+
+    Return:
+        is_end: A boolean array with shape (N,), True for a winner or a
+            full board.
+        winner: An int array with shape (N,), Board.kEmpty for no winner.
+    """
+    positions = np.asarray(positions)
+    if positions.ndim == 4 and positions.shape[1] == 4:
+        to_play_black = positions[:, 3, 0, 0] != 0
+        own, other = positions[:, 0] != 0, positions[:, 1] != 0
+        black = np.where(to_play_black[:, np.newaxis, np.newaxis], own, other)
+        white = np.where(to_play_black[:, np.newaxis, np.newaxis], other, own)
+        if current_player is None:
+            current_player = to_play_black.astype(np.int8)
+    elif positions.ndim == 3:
+        black = positions == Board.kPlayerBlack
+        white = positions == Board.kPlayerWhite
+    else:
+        raise ValueError("Expect positions with shape (N, H, W) or (N, 4, H, W), "
+                         "get {}".format(positions.shape))
+
+    black_win = _hasLine(black, number_to_win)
+    white_win = _hasLine(white, number_to_win)
+    winner = np.full(positions.shape[0], Board.kEmpty, dtype=np.int8)
+    winner[white_win] = Board.kPlayerWhite
+    winner[black_win] = Board.kPlayerBlack
+    # Only reachable by playing on after the game ended:
+    # the player who moved last is the winner, as in Board.getWinner
+    both = np.flatnonzero(black_win & white_win)
+    if both.size:
+        if current_player is None:
+            num_black = black[both].reshape(both.size, -1).sum(axis=1)
+            num_white = white[both].reshape(both.size, -1).sum(axis=1)
+            winner[both] = np.where(num_black > num_white,
+                                    Board.kPlayerBlack, Board.kPlayerWhite)
+        else:
+            winner[both] = 1 - np.asarray(current_player)[both]
+
+    is_full = (black | white).reshape(positions.shape[0], -1).all(axis=1)
+    is_end = (winner != Board.kEmpty) | is_full
+    return is_end, winner
+
+
+class BatchBoard(object):
+    """N boards of the same size played in lockstep.
+
+    The boards are stored as stacked numpy arrays, so playing a move on
+    every board, detecting the winners or building the network input
+    for all boards are single vectorized operations.
+
+    Attributes:
+        width: The width of boards.
+        height: The height of boards.
+        numberToWin: How many stones need on a line to win.
+        stones: An int8 array with shape (N, height, width). The value of
+            a position is the color of its stone or Board.kEmpty.
+        current_player: An int8 array with shape (N,), the player to play.
+        moves: An int array with shape (N, height*width), the moves played
+            on each board in order. Only the first num_moves[i] are valid.
+        num_moves: An int array with shape (N,), the number of moves played.
+    """
+
+    def __init__(self, num_boards, **kwargs):
+        """
+        @param num_boards: Number of boards N.
+        @param kwargs: The dictionary of args
+            width:          The width of board
+            height:         The height of board
+            numberToWin:    How many stones need on a line to win
+        """
+        self.__num_boards = int(num_boards)
+        self.__width = int(kwargs.get('width', 15))
+        self.__height = int(kwargs.get('height', 15))
+        self.numberToWin = int(kwargs.get('numberToWin', 5))
+        self.initBoard()
+
+    def initBoard(self, start_player=None):
+        """Clear all boards.
+
+        Args:
+            start_player: The player to play first, a single color for
+                all boards or an array with one color per board.
+        """
+        if start_player is None:
+            start_player = Board.kPlayerBlack
+        if self.__width < self.numberToWin or self.__height < self.numberToWin:
+            raise Exception("Board width({}) or height({}) can not be less than {}".format(
+                self.__width, self.__height, self.numberToWin))
+
+        num_boards = self.__num_boards
+        self.stones = np.full((num_boards, self.__height, self.__width),
+                              Board.kEmpty, dtype=np.int8)
+        self.current_player = np.empty(num_boards, dtype=np.int8)
+        self.current_player[:] = start_player
+        self.moves = np.full((num_boards, self.__width * self.__height), -1, dtype=np.int32)
+        self.num_moves = np.zeros(num_boards, dtype=np.int32)
+
+    def play(self, moves):
+        """Play one move on every board.
+
+        Args:
+            moves: An int array with shape (N,). A negative move skips
+                its board, e.g. for boards whose game has ended.
+
+        Return:
+            A boolean array with shape (N,), True where a stone was placed.
+            Occupied or out of range moves are not played.
+        """
+        moves = np.asarray(moves).reshape(-1)
+        if moves.shape[0] != self.__num_boards:
+            raise ValueError("Expect {} moves, get {}".format(self.__num_boards, moves.shape[0]))
+        flat_stones = self.stones.reshape(self.__num_boards, -1)
+        played = (moves >= 0) & (moves < self.__width * self.__height)
+        index = np.flatnonzero(played)
+        played[index] = flat_stones[index, moves[index]] == Board.kEmpty
+        index = np.flatnonzero(played)
+
+        move = moves[index]
+        flat_stones[index, move] = self.current_player[index]
+        self.moves[index, self.num_moves[index]] = move
+        self.num_moves[index] += 1
+        self.current_player[index] = 1 - self.current_player[index]
+        return played
+
+    def undo(self, mask=None):
+        """Take back the last move of every board (or of the boards in mask).
+
+        Return:
+            A boolean array with shape (N,), True where a move was undone.
+        """
+        undone = self.num_moves > 0
+        if mask is not None:
+            undone &= np.asarray(mask, dtype=bool)
+        index = np.flatnonzero(undone)
+
+        self.num_moves[index] -= 1
+        move = self.moves[index, self.num_moves[index]]
+        self.moves[index, self.num_moves[index]] = -1
+        self.stones.reshape(self.__num_boards, -1)[index, move] = Board.kEmpty
+        self.current_player[index] = 1 - self.current_player[index]
+        return undone
+
+    def getWinner(self):
+        """Return an int array with shape (N,): the winner of every board,
+        or Board.kEmpty where there is no winner.
+        """
+        _, winner = labelWinners(self.stones, self.numberToWin, self.current_player)
+        return winner
+
+    def gameEnd(self):
+        """Check whether the games are terminal.
+
+        Return:
+            is_end: A boolean array with shape (N,).
+            winner: An int array with shape (N,), Board.kEmpty for no winner.
+        """
+        return labelWinners(self.stones, self.numberToWin, self.current_player)
+
+    def currentState(self, dtype=np.float64):
+        """Return the states of all boards, same as Board.currentState but
+        stacked, with shape N * 4 * height * width.
+        """
+        state = np.zeros((self.__num_boards, 4, self.__height, self.__width), dtype=dtype)
+        current_player = self.current_player[:, np.newaxis, np.newaxis]
+        state[:, 0] = self.stones == current_player
+        state[:, 1] = self.stones == 1 - current_player
+        index = np.flatnonzero(self.num_moves > 0)
+        state.reshape(self.__num_boards, 4, -1)[
+            index, 2, self.moves[index, self.num_moves[index] - 1]] = 1
+        state[:, 3] = (self.current_player == Board.kPlayerBlack)[:, np.newaxis, np.newaxis]
+        return state
+
+    @staticmethod
+    def fromBoards(boards):
+        """Build a BatchBoard holding a copy of every given Board.
+        """
+        if not boards:
+            raise ValueError("Can not build a BatchBoard from no boards.")
+        width, height, number_to_win = boards[0].width, boards[0].height, boards[0].numberToWin
+        for board in boards:
+            if (board.width, board.height, board.numberToWin) != (width, height, number_to_win):
+                raise ValueError("All boards must have the same size and numberToWin.")
+
+        batch_board = BatchBoard(len(boards), width=width, height=height,
+                                 numberToWin=number_to_win)
+        flat_stones = batch_board.stones.reshape(len(boards), -1)
+        for i, board in enumerate(boards):
+            if board.moved:
+                moved = np.array(board.moved)
+                flat_stones[i, moved] = [board.states[move] for move in board.moved]
+                batch_board.moves[i, :len(moved)] = moved
+            batch_board.num_moves[i] = len(board.moved)
+            batch_board.current_player[i] = board.current_player
+        return batch_board
+
+    def toBoard(self, index):
+        """Return a Board with the position (and move history) of board index.
+        """
+        board = Board(width=self.__width, height=self.__height, numberToWin=self.numberToWin)
+        num_moves = self.num_moves[index]
+        board.initBoard(int(self.current_player[index]) ^ int(num_moves % 2))
+        for move in self.moves[index, :num_moves].tolist():
+            board.play(move)
+        return board
+
+    def __len__(self):
+        return self.__num_boards
+
+    @property
+    def legal_mask(self):
+        """A boolean array with shape (N, height*width), True for empty positions.
+        """
+        return self.stones.reshape(self.__num_boards, -1) == Board.kEmpty
+
+    @property
+    def last_move(self):
+        """An int array with shape (N,), -1 for boards without moves.
+        """
+        last_move = np.full(self.__num_boards, -1, dtype=np.int32)
+        index = np.flatnonzero(self.num_moves > 0)
+        last_move[index] = self.moves[index, self.num_moves[index] - 1]
+        return last_move
+
+    @property
+    def num_boards(self):
+        return self.__num_boards
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def height(self):
+        return self.__height
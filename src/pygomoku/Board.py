@@ -2,6 +2,176 @@
 from __future__ import print_function
 import numpy as np
 
+from pygomoku.Pattern import Pattern, buildPatternTable
+from pygomoku.Symmetry import Symmetry, getSymmetryTables
+
+
+def _boardLines(height, width):
+    """All lines of a board, as (direction, moves) tuples.
+
+    direction is 0 for rows, 1 for columns, 2 for main diagonals and 3
+    for deputy diagonals, moves are the moves along the line in order.
+    """
+    lines = [(0, [h * width + w for w in range(width)]) for h in range(height)]
+    lines += [(1, [h * width + w for h in range(height)]) for w in range(width)]
+    for h0, w0 in [(0, w) for w in range(width)] + [(h, 0) for h in range(1, height)]:
+        lines.append((2, [(h0 + k) * width + w0 + k
+                          for k in range(min(height - h0, width - w0))]))
+    for h0, w0 in [(0, w) for w in range(width)] + [(h, width - 1) for h in range(1, height)]:
+        lines.append((3, [(h0 + k) * width + w0 - k
+                          for k in range(min(height - h0, w0 + 1))]))
+    return lines
+
+
+_bit_tables = {}
+
+
+def _getBitTables(height, width, number_to_win):
+    """Build (or fetch from cache) the bitboard tables for a board size.
+
+    Stones are stored as bits of a python integer. Every line of the
+    board (rows, columns and both diagonals) gets its own run of bits,
+    followed by an always-empty guard bit, so each cell owns up to four
+    bits, one per direction. A line of stones in any direction is then a
+    run of adjacent bits, which can be found with shifts by 1 only, and
+    the guard bits keep runs from leaking into the next line. Lines
+    shorter than numberToWin are left out.
+
+    Return:
+        move_bits: a list, move_bits[move] is the bit pattern of that move.
+        line_shifts: the shift amounts used to fold a mask down to the
+            bits that start a run of numberToWin stones.
+    """
+    key = (height, width, number_to_win)
+    if key not in _bit_tables:
+        move_bits = [0] * (height * width)
+        bit = 0
+        for _, line in _boardLines(height, width):
+            if len(line) < number_to_win:
+                continue
+            for move in line:
+                move_bits[move] |= 1 << bit
+                bit += 1
+            bit += 1  # guard bit
+
+        line_shifts = []
+        run = 1
+        while run < number_to_win:
+            step = min(run, number_to_win - run)
+            line_shifts.append(step)
+            run += step
+        _bit_tables[key] = (move_bits, line_shifts)
+    return _bit_tables[key]
+
+
+_line_tables = {}
+
+
+def _getLineTables(height, width):
+    """Build (or fetch from cache) the neighbour tables for a board size.
+
+    Return:
+        A list with one (step, prev, succ) tuple per direction (horizontal,
+        vertical, main diagonal, deputy diagonal). step is the difference
+        of move index between neighbours on a line, prev[move] and
+        succ[move] are the neighbours of move, or -1 off the board.
+    """
+    key = (height, width)
+    if key not in _line_tables:
+        tables = []
+        for dh, dw in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            prev = [-1] * (height * width)
+            succ = [-1] * (height * width)
+            for h in range(height):
+                for w in range(width):
+                    if 0 <= h - dh < height and 0 <= w - dw < width:
+                        prev[h * width + w] = (h - dh) * width + w - dw
+                    if 0 <= h + dh < height and 0 <= w + dw < width:
+                        succ[h * width + w] = (h + dh) * width + w + dw
+            tables.append((dh * width + dw, prev, succ))
+        _line_tables[key] = tables
+    return _line_tables[key]
+
+
+_window_tables = {}
+
+
+def _getWindowTables(height, width, number_to_win):
+    """Build (or fetch from cache) the pattern window tables for a board size.
+
+    Every line is cut into all its windows of number_to_win and
+    number_to_win + 1 moves, see pygomoku.Pattern for the encoding.
+
+    Return:
+        empty_codes: the code of every window on an empty board.
+        window_directions: the direction of every window.
+        move_windows: move_windows[move] lists (window, power) for the
+            windows through move, power is the weight of its digit.
+    """
+    key = (height, width, number_to_win)
+    if key not in _window_tables:
+        empty_codes, window_directions = [], []
+        move_windows = [[] for _ in range(height * width)]
+        for direction, line in _boardLines(height, width):
+            for length, empty_code in ((number_to_win, 0),
+                                       (number_to_win + 1, 3 ** number_to_win)):
+                for start in range(len(line) - length + 1):
+                    for k in range(length):
+                        move_windows[line[start + k]].append((len(empty_codes), 3 ** k))
+                    empty_codes.append(empty_code)
+                    window_directions.append(direction)
+        _window_tables[key] = (empty_codes, window_directions, move_windows)
+    return _window_tables[key]
+
+
+_neighbourhoods = {}
+
+
+def _getNeighbourhoods(height, width, radius):
+    """Build (or fetch from cache) the neighbourhood table for a board size.
+
+    Return:
+        A list, neighbourhoods[move] lists the moves at most radius rows
+        and columns away from move, move itself excluded.
+    """
+    key = (height, width, radius)
+    if key not in _neighbourhoods:
+        neighbourhoods = []
+        for h in range(height):
+            for w in range(width):
+                neighbourhoods.append([nh * width + nw
+                                       for nh in range(max(0, h - radius), min(height, h + radius + 1))
+                                       for nw in range(max(0, w - radius), min(width, w + radius + 1))
+                                       if (nh, nw) != (h, w)])
+        _neighbourhoods[key] = neighbourhoods
+    return _neighbourhoods[key]
+
+
+_zobrist_tables = {}
+
+
+def _getZobristTable(num_moves, seed):
+    """Build (or fetch from cache) the Zobrist keys for a board size.
+
+    The keys come from numpy's RandomState, whose stream is fixed for a
+    given seed, so hashes are reproducible across processes and runs.
+
+    Return:
+        move_keys: move_keys[player][move] is the 64-bit key of a stone,
+            already xor-ed with side_key since every move flips the side.
+        side_key: the key xor-ed in when black is to play.
+        key_array: move_keys as a (2, num_moves) uint64 array.
+    """
+    key = (num_moves, seed)
+    if key not in _zobrist_tables:
+        keys = np.random.RandomState(seed).randint(
+            0, 2**64, size=2 * num_moves + 1, dtype=np.uint64).tolist()
+        side_key = keys[-1]
+        move_keys = [[k ^ side_key for k in keys[:num_moves]],
+                     [k ^ side_key for k in keys[num_moves:-1]]]
+        _zobrist_tables[key] = (move_keys, side_key, np.array(move_keys, dtype=np.uint64))
+    return _zobrist_tables[key]
+
 
 class Board(object):
     """Board class for training.
@@ -10,6 +180,7 @@ class Board(object):
         width: The width of board.
         height: The height of board.
         numberToWin: How many stones need on a line to win
+        zobrist_hash: 64-bit Zobrist hash of the position, side to move included
     """
     kPlayerWhite = 0
     kPlayerBlack = 1
@@ -27,10 +198,48 @@ class Board(object):
             width:          The width of board
             height:         The height of board
             numberToWin:    How many stones need on a line to win
+            zobristSeed:    Seed of the Zobrist keys, boards with the same
+                            size and seed hash positions identically
+            trackThreats:   If True, keep the pattern counts returned by
+                            threats up to date. Default is False since it
+                            makes play and undo several times slower
+            candidateRadius:If not 0 (default), keep the candidates list of
+                            empty positions at most this many rows and
+                            columns away from a stone (1 to 3 is sensible)
         """
         self.__width = int(kwargs.get('width', 15))
         self.__height = int(kwargs.get('height', 15))
         self.numberToWin = int(kwargs.get('numberToWin', 5))
+        self.__move_bits, self.__line_shifts = _getBitTables(
+            self.__height, self.__width, self.numberToWin)
+        self.__zobrist_keys, self.__zobrist_side, self.__zobrist_array = _getZobristTable(
+            self.__width * self.__height, int(kwargs.get('zobristSeed', 0)))
+        # feature planes, updated by play/undo and copied out by currentState
+        # they are stored flat and indexed by move
+        # stone_planes[player]: stones of that player
+        # last_plane: only one stone, the last move
+        self.__stone_planes = np.zeros(
+            (2, self.__height * self.__width), dtype=np.uint8)
+        self.__last_plane = np.zeros(
+            self.__height * self.__width, dtype=np.uint8)
+        # legal[move] is True if move is empty, exposed read-only as legal_mask
+        self.__legal = np.ones(self.__width * self.__height, dtype=bool)
+        # run lengths, one (step, prev, succ, runs) entry per direction
+        # runs[move] is the length of the run of same color stones through
+        # move, only kept up to date at both ends of every run
+        self.__run_lines = [(step, prev, succ, [0] * (self.__width * self.__height))
+                            for step, prev, succ in _getLineTables(self.__height, self.__width)]
+        # pattern counts, see threats
+        self.__track_threats = bool(kwargs.get('trackThreats', False))
+        if self.__track_threats:
+            self.__pattern_table = buildPatternTable(self.numberToWin)
+            self.__empty_codes, self.__window_directions, self.__move_windows = \
+                _getWindowTables(self.__height, self.__width, self.numberToWin)
+        # candidate moves, see candidates
+        self.__candidate_radius = int(kwargs.get('candidateRadius', 0))
+        if self.__candidate_radius:
+            self.__neighbourhoods = _getNeighbourhoods(
+                self.__height, self.__width, self.__candidate_radius)
         # states: board states stored as dictionary
         # key: moves as location on the board
         # value: player as pieces type
@@ -45,10 +254,32 @@ class Board(object):
                 self.__width, self.__height, self.numberToWin))
 
         self.__current_player = start_player
+        self.__hash = self.__zobrist_side if start_player == Board.kPlayerBlack else 0
         self.availables = list(
             range(self.__width * self.__height))  # Valid moves
+        # avail_index[move] is the position of move in availables
+        self.__avail_index = list(range(self.__width * self.__height))
+        self.__legal.fill(True)
         self.moved = []  # Moves that already have stone on it
         self.states = {}
+        # bitboards, one integer mask per player color
+        self.__masks = [0, 0]
+        self.__stone_planes.fill(0)
+        self.__last_plane.fill(0)
+        for _, _, _, runs in self.__run_lines:
+            runs[:] = [0] * len(runs)
+        # for every move: the (left, right) run lengths it joined in each
+        # direction, and the longest run it made
+        self.__run_history = []
+        self.__longest_runs = []
+        if self.__track_threats:
+            self.__initThreats()
+        # near[move]: number of stones in the neighbourhood of move
+        # a move is a candidate if it is empty and near[move] > 0
+        # candidate_index[move]: position of a candidate in candidate_list
+        self.__near = [0] * (self.__width * self.__height)
+        self.__candidate_list = []
+        self.__candidate_index = [0] * (self.__width * self.__height)
         self.__last_move = None  # Last position
 
     def isValidMove(self, move):
@@ -58,7 +289,7 @@ class Board(object):
         if move < 0 or move >= self.__width * self.__height:
             return False
 
-        if move in self.moved:
+        if not self.__legal[move]:
             return False
 
         return True
@@ -96,10 +327,43 @@ class Board(object):
         self.__current_player = 1 - self.__current_player
 
     def play(self, move):
-        if move in self.moved:
+        if move < 0 or move >= self.__width * self.__height:
+            raise ValueError("Move {} is out of the board.".format(move))
+        if not self.__legal[move]:
             return False
-        self.states[move] = self.__current_player
-        self.availables.remove(move)
+        self.__legal[move] = False
+        player = self.__current_player
+        states = self.states
+        # join the runs on both sides of move in every direction
+        joined = []
+        longest = 1
+        for step, prev, succ, runs in self.__run_lines:
+            left = runs[prev[move]] if states.get(prev[move]) == player else 0
+            right = runs[succ[move]] if states.get(succ[move]) == player else 0
+            runs[move - left * step] = runs[move + right * step] = left + 1 + right
+            joined.append((left, right))
+            if left + 1 + right > longest:
+                longest = left + 1 + right
+        self.__run_history.append(joined)
+        self.__longest_runs.append(longest)
+        if self.__candidate_radius:
+            self.__addCandidates(move)
+
+        states[move] = player
+        if self.__track_threats:
+            self.__updateThreats(move, player + 1)
+        self.__masks[self.__current_player] |= self.__move_bits[move]
+        self.__hash ^= self.__zobrist_keys[self.__current_player][move]
+        self.__stone_planes[self.__current_player, move] = 1
+        if self.__last_move is not None:
+            self.__last_plane[self.__last_move] = 0
+        self.__last_plane[move] = 1
+        # swap-remove: move the last available move into the hole
+        index = self.__avail_index[move]
+        tail = self.availables.pop()
+        if tail != move:
+            self.availables[index] = tail
+            self.__avail_index[tail] = index
         self.moved.append(move)
         self.__changePlayer()
         self.__last_move = move
@@ -108,17 +372,42 @@ class Board(object):
     def undo(self):
         if not self.moved:
             return False
-        del self.states[self.__last_move]
-        self.availables.append(self.__last_move)
-        self.moved = self.moved[:-1]
+        move = self.moved.pop()
+        player = self.states.pop(move)
+        self.__legal[move] = True
+        if self.__track_threats:
+            self.__updateThreats(move, -(player + 1))
+        if self.__candidate_radius:
+            self.__removeCandidates(move)
+        # split the runs through move back into their two sides
+        self.__longest_runs.pop()
+        for (step, _, _, runs), (left, right) in zip(self.__run_lines, self.__run_history.pop()):
+            if left:
+                runs[move - step] = runs[move - left * step] = left
+            if right:
+                runs[move + step] = runs[move + right * step] = right
+        self.__masks[player] ^= self.__move_bits[move]
+        self.__hash ^= self.__zobrist_keys[player][move]
+        self.__stone_planes[player, move] = 0
+        self.__last_plane[move] = 0
+        # revert the swap-remove of play, so availables keeps its order
+        index = self.__avail_index[move]
+        if index == len(self.availables):
+            self.availables.append(move)
+        else:
+            tail = self.availables[index]
+            self.__avail_index[tail] = len(self.availables)
+            self.availables.append(tail)
+            self.availables[index] = move
         self.__changePlayer()
         if self.moved:
             self.__last_move = self.moved[-1]
+            self.__last_plane[self.__last_move] = 1
         else:
             self.__last_move = None
         return True
 
-    def currentState(self):
+    def currentState(self, dtype=np.float64):
         """
         Return the board state from the perspective of the current player.
         state shape: 4 * height * width
@@ -127,85 +416,164 @@ class Board(object):
         board_state[1]: current board state with only opponent's stones
         board_state[2]: only one stone, indicate the last move(opponent made this move).
         board_state[3]: indicate the player to play, 0 for white, 1 for black
+
+        The planes are kept up to date by play/undo, so this only copies
+        them out and does not depend on the number of moves.
+
+        Args:
+            dtype: data type of the returned array, e.g. np.float32 or np.uint8.
+        """
+        board_state = np.empty((4, self.__height * self.__width), dtype=dtype)
+        board_state[0] = self.__stone_planes[self.__current_player]
+        board_state[1] = self.__stone_planes[1 - self.__current_player]
+        board_state[2] = self.__last_plane
+        board_state[3] = 1 if self.__current_player == Board.kPlayerBlack else 0
+        return board_state.reshape(4, self.__height, self.__width)
+
+    def canonical(self):
+        """Hash the position up to rotations and flips.
+
+        The hash of the position is computed in the frame of every
+        transform in pygomoku.Symmetry and the smallest one is kept, so
+        symmetric positions share the same canonical hash.
+
+        Return:
+            canonical_hash: the smallest of the transformed Zobrist hashes.
+            transform: the transform mapping the board to the canonical
+                frame, e.g. for Symmetry.transformMove/transformPolicy.
+        """
+        if not self.moved:
+            return self.__hash, Symmetry.kIdentity
+        transforms, move_maps = getSymmetryTables(self.__height, self.__width)
+        moved = np.array(self.moved)
+        colors = self.__stone_planes[Board.kPlayerBlack][moved]
+        # the side key is already in every move key and cancels out
+        keys = self.__zobrist_array
+        stone_keys = np.bitwise_xor.reduce(keys[colors, moved])
+        hashes = np.bitwise_xor.reduce(keys[colors, move_maps[:, moved]], axis=1)
+        hashes ^= np.uint64(self.__hash) ^ stone_keys
+        index = int(np.argmin(hashes))
+        return int(hashes[index]), transforms[index]
+
+    def __addCandidates(self, move):
+        """Update the candidates after a stone is put on move, in O(radius^2).
         """
-        board_state = np.zeros((4, self.__height, self.__width))
-
-        if self.states:  # if self.states is not empty
-            moves, players = np.array(list(zip(*self.states.items())))
-            curr_moves = moves[players == self.__current_player]
-            oppo_moves = moves[players != self.__current_player]
-            board_state[0][curr_moves // self.__width,
-                           curr_moves % self.__width] = 1
-            board_state[1][oppo_moves // self.__width,
-                           oppo_moves % self.__width] = 1
-            board_state[2][self.__last_move // self.__width,
-                           self.__last_move % self.__width] = 1
-
-        if self.__current_player == Board.kPlayerBlack:
-            board_state[3] += 1
-        
-        return board_state
+        near = self.__near
+        candidate_list = self.__candidate_list
+        candidate_index = self.__candidate_index
+        # swap-remove move itself, as for availables
+        if near[move]:
+            index = candidate_index[move]
+            tail = candidate_list.pop()
+            if tail != move:
+                candidate_list[index] = tail
+                candidate_index[tail] = index
+        legal = self.__legal
+        for neighbour in self.__neighbourhoods[move]:
+            near[neighbour] += 1
+            if near[neighbour] == 1 and legal[neighbour]:
+                candidate_index[neighbour] = len(candidate_list)
+                candidate_list.append(neighbour)
+
+    def __removeCandidates(self, move):
+        """Revert __addCandidates after the stone on move is taken back,
+        leaving the candidate list in its exact former order.
+        """
+        near = self.__near
+        candidate_list = self.__candidate_list
+        candidate_index = self.__candidate_index
+        legal = self.__legal
+        # the neighbours added by play are the last ones of the list
+        for neighbour in reversed(self.__neighbourhoods[move]):
+            near[neighbour] -= 1
+            if near[neighbour] == 0 and legal[neighbour]:
+                candidate_list.pop()
+        if near[move]:
+            index = candidate_index[move]
+            if index == len(candidate_list):
+                candidate_list.append(move)
+            else:
+                tail = candidate_list[index]
+                candidate_index[tail] = len(candidate_list)
+                candidate_list.append(tail)
+                candidate_list[index] = move
+
+    def __initThreats(self):
+        # window_codes[window]: the code of every window
+        # threat_counts[player][direction][pattern]: number of windows
+        self.__window_codes = list(self.__empty_codes)
+        self.__threat_counts = [[[0] * Pattern.kNumPatterns for _ in range(4)]
+                                for _ in range(2)]
+        for code, direction in zip(self.__window_codes, self.__window_directions):
+            for player in (Board.kPlayerWhite, Board.kPlayerBlack):
+                self.__threat_counts[player][direction][self.__pattern_table[player][code]] += 1
+
+    def __updateThreats(self, move, delta):
+        """Update the windows through move after a stone is added (delta is
+        player + 1) or removed (delta is -(player + 1)).
+        """
+        codes = self.__window_codes
+        directions = self.__window_directions
+        white_table, black_table = self.__pattern_table
+        white_counts, black_counts = self.__threat_counts
+        for window, power in self.__move_windows[move]:
+            old_code = codes[window]
+            new_code = old_code + delta * power
+            codes[window] = new_code
+            old_pattern, new_pattern = white_table[old_code], white_table[new_code]
+            if old_pattern != new_pattern:
+                counts = white_counts[directions[window]]
+                counts[old_pattern] -= 1
+                counts[new_pattern] += 1
+            old_pattern, new_pattern = black_table[old_code], black_table[new_code]
+            if old_pattern != new_pattern:
+                counts = black_counts[directions[window]]
+                counts[old_pattern] -= 1
+                counts[new_pattern] += 1
+
+    def threats(self, player_color, direction=None):
+        """Count the line patterns of a player, in O(1).
+
+        Only available if the board is created with trackThreats=True.
+
+        Args:
+            player_color: Board.kPlayerBlack or Board.kPlayerWhite.
+            direction: 0 (horizontal), 1 (vertical), 2 (main diagonal) or
+                3 (deputy diagonal). If None, count over all directions.
+
+        Return:
+            A list indexed by the pattern ids of pygomoku.Pattern.Pattern,
+            e.g. counts[Pattern.kOpenThree]. counts[Pattern.kNone] is 0.
+        """
+        if not self.__track_threats:
+            raise RuntimeError("Board is not created with trackThreats=True.")
+        if direction is None:
+            counts = [sum(direction_counts) for direction_counts in
+                      zip(*self.__threat_counts[player_color])]
+        else:
+            counts = list(self.__threat_counts[player_color][direction])
+        counts[Pattern.kNone] = 0
+        return counts
+
+    def __hasLine(self, mask):
+        """Check whether a bitboard mask holds numberToWin stones in a line.
+
+        The mask is folded with shift-and-AND until only the bits starting
+        a long enough run survive. All four directions are checked at once.
+        """
+        for shift in self.__line_shifts:
+            mask &= mask >> shift
+        return mask != 0
 
     def fastGetWinner(self):
         """
         If the game is plain sailing, i.e. the only operation is play stone and remove stone from board,
         then the last move will end the game, and only the last move can determine the winner.
-        """
-        if len(self.moved) < 2*self.numberToWin-1:  # No player has put numberToWin stones on the board
-            return None
-
-        # Horizontal
-        for m in self.moved[::-1][:2]:
-            last_player = self.states[m]
-            # Here we try to find a interval whose elements are have same color with last_player, the interval is [)
-            left_bd = self.__last_move
-            right_bd = self.__last_move + 1
-            while self.states.get(left_bd-1, Board.kEmpty) == last_player and left_bd % self.__width != 0:
-                left_bd -= 1
-            while self.states.get(right_bd, Board.kEmpty) == last_player and right_bd % self.__width != 0:
-                right_bd += 1
-            if (right_bd - left_bd) >= self.numberToWin:
-                return last_player
-
-            # Vertical
-            left_bd = self.__last_move
-            right_bd = self.__last_move + self.__width
-            count = 1
-            while self.states.get(left_bd - self.__width, Board.kEmpty) == last_player:
-                left_bd -= self.__width
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == last_player:
-                right_bd += self.__width
-                count += 1
-            if count >= self.numberToWin:
-                return last_player
-
-            # main diagonal
-            left_bd = self.__last_move
-            right_bd = self.__last_move + self.__width + 1
-            count = 1
-            while self.states.get(left_bd - 1 - self.__width, Board.kEmpty) == last_player and left_bd % self.__width != 0:
-                left_bd -= (self.__width + 1)
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == last_player and right_bd % self.__width != 0:
-                right_bd += (self.__width + 1)
-                count += 1
-            if count >= self.numberToWin:
-                return last_player
-
-            # deputy diagonal
-            left_bd = self.__last_move
-            right_bd = self.__last_move + self.__width - 1
-            count = 1
-            while self.states.get(left_bd + 1 - self.__width, Board.kEmpty) == last_player and left_bd % self.__width != self.__width - 1:
-                left_bd -= (self.__width - 1)
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == last_player and right_bd % self.__width != self.__width - 1:
-                right_bd += (self.__width - 1)
-                count += 1
-            if count >= self.numberToWin:
-                return last_player
 
+        The longest run made by every move is kept by play/undo, so this is O(1).
+        """
+        if self.__longest_runs and self.__longest_runs[-1] >= self.numberToWin:
+            return self.states[self.__last_move]
         return None
 
     def getWinner(self):
@@ -215,58 +583,10 @@ class Board(object):
         if len(self.moved) < 2*self.numberToWin-1:  # No player has put numberToWin stones on the board
             return None
 
-        for m in self.moved[::-1]:
-            curr_player = self.states[m]
-
-            # Horizontal
-            # Here we try to find a interval whose elements are have same color with last_player, the interval is [)
-            left_bd = m
-            right_bd = m + 1
-            while self.states.get(left_bd-1, Board.kEmpty) == curr_player and left_bd % self.__width != 0:
-                left_bd -= 1
-            while self.states.get(right_bd, Board.kEmpty) == curr_player and right_bd % self.__width != 0:
-                right_bd += 1
-            if (right_bd - left_bd) >= self.numberToWin:
-                return curr_player
-
-            # Vertical
-            left_bd = m
-            right_bd = m + self.__width
-            count = 1
-            while self.states.get(left_bd - self.__width, Board.kEmpty) == curr_player:
-                left_bd -= self.__width
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == curr_player:
-                right_bd += self.__width
-                count += 1
-            if count >= self.numberToWin:
-                return curr_player
-
-            # main diagonal
-            left_bd = m
-            right_bd = m + self.__width + 1
-            count = 1
-            while self.states.get(left_bd - 1 - self.__width, Board.kEmpty) == curr_player and left_bd % self.__width != 0:
-                left_bd -= (self.__width + 1)
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == curr_player and right_bd % self.__width != 0:
-                right_bd += (self.__width + 1)
-                count += 1
-            if count >= self.numberToWin:
-                return curr_player
-
-            # deputy diagonal
-            left_bd = m
-            right_bd = m + self.__width - 1
-            count = 1
-            while self.states.get(left_bd + 1 - self.__width, Board.kEmpty) == curr_player and left_bd % self.__width != self.__width - 1:
-                left_bd -= (self.__width - 1)
-                count += 1
-            while self.states.get(right_bd, Board.kEmpty) == curr_player and right_bd % self.__width != self.__width - 1:
-                right_bd += (self.__width - 1)
-                count += 1
-            if count >= self.numberToWin:
-                return curr_player
+        last_player = self.states[self.__last_move]
+        for player in (last_player, 1 - last_player):
+            if self.__hasLine(self.__masks[player]):
+                return player
         return None
 
     def gameEnd(self):
@@ -284,21 +604,16 @@ class Board(object):
 
     def printBoard(self):
         print("Current turn: [{}]".format(Board.kStoneChar[self.__current_player]))
-        curr_state = np.zeros([self.__width, self.__height],
-                              dtype=np.int) + Board.kEmpty
+        curr_state = np.zeros([self.__height, self.__width],
+                              dtype=int) + Board.kEmpty
         if self.__last_move:
             last_h_idx, last_w_idx = self.moveToLocation(self.__last_move)
         else:
             last_h_idx, last_w_idx = -1, -1
 
-        if self.states:
-            moves, players = np.array(list(zip(*self.states.items())))
-            black_moves = moves[players == Board.kPlayerBlack]
-            white_moves = moves[players == Board.kPlayerWhite]
-            curr_state[black_moves // self.__width, black_moves %
-                       self.__width] = Board.kPlayerBlack
-            curr_state[white_moves // self.__width, white_moves %
-                       self.__width] = Board.kPlayerWhite
+        stone_planes = self.__stone_planes.reshape(2, self.__height, self.__width)
+        curr_state[stone_planes[Board.kPlayerBlack] == 1] = Board.kPlayerBlack
+        curr_state[stone_planes[Board.kPlayerWhite] == 1] = Board.kPlayerWhite
 
         for w in range(self.__width):
             print("{0:8d}".format(w), end='')
@@ -335,6 +650,34 @@ class Board(object):
     def last_move(self):
         return self.__last_move
 
+    @property
+    def zobrist_hash(self):
+        return self.__hash
+
+    @property
+    def candidates(self):
+        """Empty positions near the stones on board, see candidateRadius.
+
+        Falls back to availables if the board keeps no candidates
+        (candidateRadius is 0) or has none, e.g. when it is empty.
+        Returns a new list, so it stays valid while the board moves on.
+        """
+        if self.__candidate_list:
+            return list(self.__candidate_list)
+        return list(self.availables)
+
+    @property
+    def candidate_radius(self):
+        return self.__candidate_radius
+
+    @property
+    def legal_mask(self):
+        """A read-only boolean array of size height*width, True for empty positions.
+        """
+        legal_mask = self.__legal.view()
+        legal_mask.flags.writeable = False
+        return legal_mask
+
     @property
     def width(self):
         return self.__width
@@ -114,6 +114,8 @@ class GameServer(object):
                 self.showGameInfo()
             is_end, winner = self.board.gameEnd()
             if is_end:
+                self.player1.stopPondering()
+                self.player2.stopPondering()
                 if not self.silent:
                     if winner is not None:
                         print("Game end with winner {}(color {}).".format(players[winner].name, stone_color[winner]))
@@ -0,0 +1,114 @@
+# coding=utf-8
+"""Line patterns (threats) of gomoku and their lookup tables.
+
+Every line of the board is cut into overlapping windows of numberToWin
+and numberToWin + 1 cells. A window is encoded as a base-3 number
+(0 for empty, 1 for white, 2 for black, one digit per cell), and a
+precomputed table maps the code straight to the pattern it forms for
+each player, so keeping pattern counts up to date only needs a table
+lookup for the windows through the changed cell.
+"""
+from __future__ import print_function
+
+
+class Pattern(object):
+    """Pattern ids, named after the usual five-in-a-row shapes.
+
+    Windows of numberToWin cells without opponent stones:
+        kFive: full of own stones.
+        kFour: one empty cell, i.e. one move from a five.
+    Windows of numberToWin + 1 cells with empty ends and no opponent stones
+    inside:
+        kOpenFour: the inside is full, i.e. _XXXX_.
+        kOpenThree: one empty cell inside at one end, i.e. _XXX__ and __XXX_.
+        kBrokenThree: one empty cell inside between stones, i.e. _XX_X_ and _X_XX_.
+        kOpenTwo: two own stones inside, e.g. __XX__ and _X_X__.
+
+    Patterns are counted per window, so a shape with room to spare can
+    match more than one window, e.g. __XXX__ counts as two open threes,
+    and an open four also holds two fours.
+    """
+    kNone = 0
+    kOpenTwo = 1
+    kBrokenThree = 2
+    kOpenThree = 3
+    kFour = 4
+    kOpenFour = 5
+    kFive = 6
+    kNumPatterns = 7
+
+    kNames = {
+        0: "none",
+        1: "open two",
+        2: "broken three",
+        3: "open three",
+        4: "four",
+        5: "open four",
+        6: "five",
+    }
+
+    # default weights of scoreThreats
+    kScores = [0, 10, 80, 100, 120, 2000, 100000]
+
+
+_pattern_tables = {}
+
+
+def _classify(cells, number_to_win):
+    """Return the pattern of a window, cells hold 1 for own stones,
+    -1 for opponent stones and 0 for empty positions.
+    """
+    if len(cells) == number_to_win:
+        if -1 in cells:
+            return Pattern.kNone
+        num_own = sum(cells)
+        if num_own == number_to_win:
+            return Pattern.kFive
+        if num_own == number_to_win - 1:
+            return Pattern.kFour
+        return Pattern.kNone
+
+    if cells[0] or cells[-1] or -1 in cells:
+        return Pattern.kNone
+    inner = cells[1:-1]
+    num_own = sum(inner)
+    if num_own == number_to_win - 1:
+        return Pattern.kOpenFour
+    if num_own == number_to_win - 2:
+        if inner[0] == 0 or inner[-1] == 0:
+            return Pattern.kOpenThree
+        return Pattern.kBrokenThree
+    if num_own == number_to_win - 3 and num_own >= 1:
+        return Pattern.kOpenTwo
+    return Pattern.kNone
+
+
+def buildPatternTable(number_to_win):
+    """Build (or fetch from cache) the pattern lookup table.
+
+    Codes below 3**number_to_win are windows of number_to_win cells, the
+    codes from 3**number_to_win on are windows of number_to_win + 1 cells
+    (offset by 3**number_to_win). Digit k of a code is the value of cell
+    k of the window: 0 for empty, player color + 1 for a stone.
+
+    Return:
+        table: table[player][code] is the pattern id of the window for player.
+    """
+    if number_to_win not in _pattern_tables:
+        table = [[], []]
+        for length in (number_to_win, number_to_win + 1):
+            for code in range(3 ** length):
+                digits = [(code // 3 ** k) % 3 for k in range(length)]
+                for player in (0, 1):
+                    cells = [0 if d == 0 else (1 if d == player + 1 else -1) for d in digits]
+                    table[player].append(_classify(cells, number_to_win))
+        _pattern_tables[number_to_win] = table
+    return _pattern_tables[number_to_win]
+
+
+def scoreThreats(counts, scores=None):
+    """Weighted sum of pattern counts, e.g. the result of Board.threats.
+    """
+    if scores is None:
+        scores = Pattern.kScores
+    return sum(count * score for count, score in zip(counts, scores))
@@ -1,11 +1,14 @@
 # coding=utf-8
 from __future__ import print_function
 import abc
+import copy
 import six
 import sys
+import time
 import numpy as np
 from pygomoku.Board import Board
 from pygomoku.mcts.MCTS import MCTS, MCTSWithDNN
+from pygomoku.mcts.ParallelMCTS import RootParallelMCTS, TreeParallelMCTS
 from pygomoku.mcts.policy_fn import rollout_policy_fn, MCTS_expand_policy_fn
 from pygomoku.mcts.Networks import SimpleCNN
 
@@ -29,6 +32,18 @@ class Player(object):
         """
         pass
 
+    def stopPondering(self):
+        """Stop searching in the background, see PureMCTSPlayer ponder.
+        Players that do not ponder do nothing.
+        """
+        pass
+
+    def close(self):
+        """Release the background threads and processes of the player.
+        Players that have none do nothing.
+        """
+        pass
+
 
 class HumanPlayer(Player):
     """
@@ -122,19 +137,82 @@ class HumanPlayer(Player):
     __repr__ = __str__
 
 
+def _moveTimeLimit(board, time_limit, time_manager):
+    """Return the time limit in milliseconds of the next move on board,
+    the smaller one of time_limit and the move time of time_manager, or
+    None if both are None.
+    """
+    if time_manager is None:
+        return time_limit
+    move_time = time_manager.moveTime(board)
+    return move_time if time_limit is None else min(move_time, time_limit)
+
+
+def _startPondering(search_tree, board, move):
+    """Let search_tree ponder on a copy of board after move.
+    """
+    ponder_board = copy.deepcopy(board)
+    ponder_board.play(move)
+    search_tree.startPondering(ponder_board)
+
+
 class PureMCTSPlayer(Player):
     """
     Pure MCTS player
+
+    With num_workers > 1 the player searches with RootParallelMCTS, every
+    worker process running compute_budget playouts. The processes live
+    until close is called. transposition_size is
+    the size of the transposition table of a single process search (see MCTS).
+
+    time_limit is the most milliseconds a move can take, and time_manager
+    a TimeManager giving the time of every move from a game clock (the
+    smaller one is used if both are given). With early_stop, a single
+    process search stops early once its move is settled, and with solver
+    it proves wins and losses, see MCTS.
+    num_rollouts is the number of random games played at every leaf and
+    fast_rollout selects the shuffled rollouts, see MCTS. max_nodes and
+    max_bytes limit the memory of the search tree (of every worker).
+
+    With ponder, the player keeps searching in a background thread after
+    its move, until the opponent's move arrives, and starts its next
+    search from the subtree of that move, with the playouts already
+    in it counted toward compute_budget. The thread shares the
+    interpreter, so this pays off against human players (or players in
+    other processes), not against a search in the same process.
+
+    With collect_stats (or a stats_callback), a single process search
+    collects the SearchStats of every move, see MCTS, and stats holds
+    the ones of the last move.
     """
-    def __init__(self, color, name="Pure MCTS player", weight_c=5, compute_budget=10000, silent=False):
-        self._search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn,
-            weight_c=weight_c, compute_budget=compute_budget, silent=silent)
+    def __init__(self, color, name="Pure MCTS player", weight_c=5, compute_budget=10000, silent=False,
+                 tree_backend="node", num_workers=1, transposition_size=0,
+                 time_limit=None, time_manager=None, early_stop=False, num_rollouts=1,
+                 fast_rollout=False, max_nodes=None, max_bytes=None, ponder=False,
+                 collect_stats=False, stats_callback=None, solver=False):
+        if num_workers > 1:
+            self._search_tree = RootParallelMCTS(MCTS_expand_policy_fn, rollout_policy_fn,
+                weight_c=weight_c, compute_budget=compute_budget, silent=silent,
+                tree_backend=tree_backend, num_workers=num_workers, num_rollouts=num_rollouts,
+                fast_rollout=fast_rollout, max_nodes=max_nodes, max_bytes=max_bytes)
+        else:
+            self._search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn,
+                weight_c=weight_c, compute_budget=compute_budget, silent=silent,
+                tree_backend=tree_backend, transposition_size=transposition_size,
+                early_stop=early_stop, num_rollouts=num_rollouts, fast_rollout=fast_rollout,
+                max_nodes=max_nodes, max_bytes=max_bytes, count_reused=ponder,
+                collect_stats=collect_stats, stats_callback=stats_callback, solver=solver)
         self.__color = color
         self.__name = name
         self.__silent = silent
+        self.__time_limit = time_limit
+        self.__time_manager = time_manager
+        self.__ponder = ponder
     
     def reset(self):
         self._search_tree.reset()
+        if self.__time_manager is not None:
+            self.__time_manager.reset()
     
     def __str__(self):
         if self.__color == Board.kPlayerBlack:
@@ -160,9 +238,25 @@ class PureMCTSPlayer(Player):
         self._search_tree.updateWithMove(board.last_move)
         
         # get next move
-        next_move = self._search_tree.getMove(board)
+        start = time.time()
+        next_move = self._search_tree.getMove(
+            board, _moveTimeLimit(board, self.__time_limit, self.__time_manager))
+        if self.__time_manager is not None:
+            self.__time_manager.update((time.time() - start) * 1000)
         self._search_tree.updateWithMove(next_move)
+        if self.__ponder:
+            _startPondering(self._search_tree, board, next_move)
         return next_move
+
+    def stopPondering(self):
+        self._search_tree.stopPondering()
+
+    def close(self):
+        """Stop pondering and the worker processes of a num_workers > 1
+        search. A closed player can still play, the workers are started
+        again by the next move.
+        """
+        self._search_tree.close()
     
     def gaussNext(self, board, careless_level=100):
         """Gauss next move of opponent.
@@ -198,6 +292,12 @@ class PureMCTSPlayer(Player):
             self.__silent = given_value
             self._search_tree.silent = given_value
 
+    @property
+    def stats(self):
+        """The SearchStats of the last move, None if they are not collected.
+        """
+        return self._search_tree.stats
+
 class DNNMCTSPlayer(Player):
     """
     MCTS player with DNN.
@@ -210,20 +310,70 @@ class DNNMCTSPlayer(Player):
         exploration_level: temperature parameter in (0, 1] controls 
                 the level of exploration.
         self_play: If True, use self_play mode.
+        batch_size: How many leaves the search evaluates with one network call,
+            needs a network with policyValueBatchFunc if greater than 1.
+        num_threads: If greater than 1, search with TreeParallelMCTS using
+            this many threads (batch_size is not used then).
+        transposition_size: The size of the transposition table of the
+            search, 0 for none. Only used with batch_size 1 and one thread.
+        time_limit, time_manager, early_stop: See PureMCTSPlayer. There is
+            no early stop in self_play mode, where the visit distribution
+            of the search is the training target.
+        max_nodes, max_bytes: The memory limit of the search tree, see MCTS.
+        ponder: Search in the background during the opponent's turn, see
+            PureMCTSPlayer. Not used in self_play mode.
+        top_k, widen_rate, widen_exponent: Progressive widening of the
+            search, see MCTSWithDNN. None top_k for no widening.
+        collect_stats, stats_callback: Collect the SearchStats of every
+            move, see MCTS. stats holds the ones of the last move.
+        solver: Prove wins and losses in the search, see MCTS. Not used in
+            self_play mode, where it would cut the search short.
     """
     def __init__(self, color, network, name="DNN MCTS Player",
                  weight_c=5, compute_budget=10000, exploration_level=1e-4,
-                 self_play=False, silent=False):
+                 self_play=False, silent=False, tree_backend="node", batch_size=1, num_threads=1,
+                 transposition_size=0, time_limit=None, time_manager=None, early_stop=False,
+                 max_nodes=None, max_bytes=None, ponder=False,
+                 top_k=None, widen_rate=1.0, widen_exponent=0.5, collect_stats=False,
+                 stats_callback=None, solver=False):
         self._color = color
         self._name = name
         self.network = network
-        self._search_tree = MCTSWithDNN(network.policyValueFunc, weight_c, compute_budget, silent=silent)
+        self._early_stop = early_stop
+        self._solver = solver
+        self._ponder = ponder
+        early_stop = early_stop and not self_play
+        ponder = ponder and not self_play
+        solver = solver and not self_play
+        if num_threads > 1:
+            self._search_tree = TreeParallelMCTS(network.policyValueFunc, weight_c, compute_budget,
+                                                 silent=silent, tree_backend=tree_backend,
+                                                 num_threads=num_threads, early_stop=early_stop,
+                                                 max_nodes=max_nodes, max_bytes=max_bytes,
+                                                 count_reused=ponder, top_k=top_k,
+                                                 widen_rate=widen_rate,
+                                                 widen_exponent=widen_exponent,
+                                                 collect_stats=collect_stats,
+                                                 stats_callback=stats_callback, solver=solver)
+        else:
+            self._search_tree = MCTSWithDNN(network.policyValueFunc, weight_c, compute_budget, silent=silent,
+                                            tree_backend=tree_backend, batch_size=batch_size,
+                                            policy_value_batch_fn=getattr(network, "policyValueBatchFunc", None),
+                                            transposition_size=transposition_size, early_stop=early_stop,
+                                            max_nodes=max_nodes, max_bytes=max_bytes, count_reused=ponder,
+                                            top_k=top_k, widen_rate=widen_rate,
+                                            widen_exponent=widen_exponent, collect_stats=collect_stats,
+                                            stats_callback=stats_callback, solver=solver)
         self._silent = silent
         self.exploration_level = exploration_level
         self._self_play = self_play
+        self._time_limit = time_limit
+        self._time_manager = time_manager
     
     def reset(self):
         self._search_tree.reset()
+        if self._time_manager is not None:
+            self._time_manager.reset()
 
     def getAction(self, board, return_policy_vec=False):
         # check color
@@ -235,8 +385,15 @@ class DNNMCTSPlayer(Player):
             board.height != self.network.height):
             raise ValueError("The size of network ({},{}) is not equal to the size of board({},{})".format(
                              self.network.height, self.network.width, board.height, board.width))
+        if not self._self_play:
+            # step to the opponent's move before searching
+            self._search_tree.updateWithMove(board.last_move)
         # get next move
-        actions, probs = self._search_tree.getMove(board, self.exploration_level)
+        start = time.time()
+        actions, probs = self._search_tree.getMove(
+            board, self.exploration_level, _moveTimeLimit(board, self._time_limit, self._time_manager))
+        if self._time_manager is not None:
+            self._time_manager.update((time.time() - start) * 1000)
         if self._self_play:
             # Add Dirichlet prior noise for training.
             move = np.random.choice(
@@ -246,9 +403,10 @@ class DNNMCTSPlayer(Player):
             # update only once because the opponent(itself) will update too.
             self._search_tree.updateWithMove(move)
         else:   # play with true opponent
-            self._search_tree.updateWithMove(board.last_move)
             move = np.random.choice(actions, p=probs)
             self._search_tree.updateWithMove(move)
+            if self._ponder:
+                _startPondering(self._search_tree, board, move)
         
         if return_policy_vec:
             policy_vec = np.zeros(board.width * board.height)
@@ -273,6 +431,12 @@ class DNNMCTSPlayer(Player):
 
     def gaussNext(self):
         pass
+
+    def stopPondering(self):
+        self._search_tree.stopPondering()
+
+    def close(self):
+        self._search_tree.close()
     
     @property
     def color(self):
@@ -304,7 +468,18 @@ class DNNMCTSPlayer(Player):
         return self._self_play
     @self_play.setter
     def self_play(self, given_value):
-        if isinstance(given_value, bool):
+        if isinstance(given_value, bool) and given_value != self._self_play:
             self._self_play = given_value
+            # the tree follows the moves differently in the two modes
+            self._search_tree.reset()
+            self._search_tree.early_stop = self._early_stop and not given_value
+            self._search_tree.solver = self._solver and not given_value
+            self._search_tree.count_reused = self._ponder and not given_value
+
+    @property
+    def stats(self):
+        """The SearchStats of the last move, None if they are not collected.
+        """
+        return self._search_tree.stats
 
     
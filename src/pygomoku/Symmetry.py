@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Dihedral symmetries (rotations and flips) of the board.
+
+A transform is an id from 0 to 7: the board is first rotated
+counterclockwise by 90 degrees (transform % 4) times, as np.rot90 does,
+then flipped left to right if transform >= 4. Only the ids 0, 2, 4 and
+6 keep the shape of a board whose width differs from its height.
+
+Moves are mapped through precomputed permutation tables, see
+getSymmetryTables, so the helpers here only index arrays.
+"""
+from __future__ import print_function
+import numpy as np
+
+
+class Symmetry(object):
+    """Transform ids.
+    """
+    kIdentity = 0
+    kRot90 = 1
+    kRot180 = 2
+    kRot270 = 3
+    kFlip = 4
+    kRot90Flip = 5
+    kRot180Flip = 6
+    kRot270Flip = 7
+    kNumTransforms = 8
+
+
+_symmetry_tables = {}
+
+
+def transformPlanes(planes, transform):
+    """Apply transform to an array whose last two axes are (height, width),
+    e.g. the result of Board.currentState or a batch of them.
+    """
+    planes = np.rot90(planes, transform % 4, axes=(-2, -1))
+    if transform >= Symmetry.kFlip:
+        planes = np.flip(planes, axis=-1)
+    return planes
+
+
+def inverseTransform(transform):
+    """The transform undoing transform, flips are their own inverse.
+    """
+    if transform >= Symmetry.kFlip:
+        return transform
+    return (4 - transform) % 4
+
+
+def getSymmetryTables(height, width):
+    """Build (or fetch from cache) the move permutations of a board size.
+
+    Return:
+        transforms: the transform ids valid for the board size.
+        move_maps: an int array with shape (len(transforms), height*width),
+            move_maps[i][move] is where move lands after transforms[i].
+    """
+    key = (height, width)
+    if key not in _symmetry_tables:
+        if height == width:
+            transforms = list(range(Symmetry.kNumTransforms))
+        else:
+            transforms = [Symmetry.kIdentity, Symmetry.kRot180,
+                          Symmetry.kFlip, Symmetry.kRot180Flip]
+        moves = np.arange(height * width).reshape(height, width)
+        move_maps = np.empty((len(transforms), height * width), dtype=np.intp)
+        for i, transform in enumerate(transforms):
+            # transformed[new] is the move now at new, invert it
+            move_maps[i][transformPlanes(moves, transform).reshape(-1)] = moves.reshape(-1)
+        move_maps.flags.writeable = False
+        _symmetry_tables[key] = (transforms, move_maps)
+    return _symmetry_tables[key]
+
+
+def _moveMap(transform, height, width):
+    transforms, move_maps = getSymmetryTables(height, width)
+    if transform not in transforms:
+        raise ValueError("Transform {} does not fit a {}x{} board.".format(
+            transform, height, width))
+    return move_maps[transforms.index(transform)]
+
+
+def transformMove(move, transform, height, width, inverse=False):
+    """Map a move (or an array of moves) through transform.
+
+    With inverse=True map it back, e.g. a move chosen in the canonical
+    frame of Board.canonical to the frame of the board.
+    """
+    if inverse:
+        transform = inverseTransform(transform)
+    move_map = _moveMap(transform, height, width)
+    if isinstance(move, (int, np.integer)):
+        return int(move_map[move])
+    return move_map[np.asarray(move)]
+
+
+def transformPolicy(policy, transform, height, width, inverse=False):
+    """Map a policy vector (or a batch, the last axis has size height*width)
+    through transform, or back with inverse=True.
+    """
+    if not inverse:
+        transform = inverseTransform(transform)
+    # policy[..., move] goes to result[..., move_map[move]], so the result
+    # gathers through the map of the opposite direction
+    return np.asarray(policy)[..., _moveMap(transform, height, width)]
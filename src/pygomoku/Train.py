@@ -14,7 +14,8 @@ class TrainServer(object):
         self.config = config
         self.board = Board(width=config["board_width"],
                            height=config["board_height"],
-                           numberToWin=config["number_to_win"])
+                           numberToWin=config["number_to_win"],
+                           candidateRadius=config.get("candidate_radius", 0))
         self.entropy_upper_bound = ln(config["board_width"] * config["board_height"])
 
         # check the network is a Neural network.
@@ -36,7 +37,10 @@ class TrainServer(object):
                                     weight_c=config["MCTS_exploration_weight"],
                                     compute_budget=config["MCTS_compute_budget"],
                                     exploration_level=config["player_exploration_level"],
-                                    self_play=True)
+                                    self_play=True,
+                                    batch_size=config.get("MCTS_batch_size", 1),
+                                    transposition_size=config.get("MCTS_transposition_size", 0),
+                                    top_k=config.get("MCTS_top_k"))
 
         self.game_server = GameServer(self.board, GameServer.kSelfPlayGame,
                                       self.player, silent=True)
@@ -156,6 +160,7 @@ class TrainServer(object):
             winner = val_game_saver.startGame()
             if winner == self.player.color:
                 num_win_game += 1
+        oppo_player.close()
         self.player.self_play = True
         return num_win_game*1.0 / num_validation_game
 
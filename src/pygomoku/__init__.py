@@ -1,7 +1,10 @@
 #!/bin/bash
 # coding=utf-8
+import pygomoku.Pattern
+import pygomoku.Symmetry
 import pygomoku.Board
+import pygomoku.BatchBoard
 import pygomoku.Player
 import pygomoku.GameServer
 
-__all__ = [pygomoku.Board, pygomoku.Player, pygomoku.GameServer]
+__all__ = [pygomoku.Pattern, pygomoku.Symmetry, pygomoku.Board, pygomoku.BatchBoard, pygomoku.Player, pygomoku.GameServer]
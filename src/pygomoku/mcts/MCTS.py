@@ -1,5 +1,8 @@
 import abc
-import copy
+import heapq
+import operator
+import threading
+import time
 
 import numpy as np
 import six
@@ -7,6 +10,8 @@ import six
 from pygomoku.Board import Board
 from pygomoku.mcts import policy_fn
 from pygomoku.mcts.progressbar import ProgressBar
+from pygomoku.mcts.Rollout import batchRollout, shuffledRollout
+from pygomoku.mcts.SearchStats import SearchStats
 
 
 def softmax(x):
@@ -15,6 +20,30 @@ def softmax(x):
     return probs
 
 
+def rewind(state, num_moves):
+    """Undo moves on state until only num_moves moves are left on it.
+    """
+    while len(state.moved) > num_moves:
+        state.undo()
+
+
+def _leadIsSafe(root_children, num_left):
+    """Return True if the most visited of root_children, a list of (action,
+    vis_times), can not be overtaken within num_left more playouts.
+    """
+    top = heapq.nlargest(2, [vis for _, vis in root_children])
+    if not top:
+        return False
+    return top[0] - (top[1] if len(top) > 1 else 0) > num_left
+
+
+def _deadline(time_limit):
+    """Return the time.time() at which a search of time_limit milliseconds
+    has to stop, or None if time_limit is None.
+    """
+    return None if time_limit is None else time.time() + time_limit / 1000.0
+
+
 def action_prob_via_vis_times(vis_times):
     activates = vis_times - np.max(vis_times)
     probs = activates / np.sum(activates)
@@ -82,11 +111,189 @@ class TreeSearch(object):
     """The abstract class for tree search.
     """
 
+    # How many playouts pass between two checks of the early stop rule.
+    kStopCheckInterval = 16
+    # A tree over its node limit is pruned to this fraction of the limit,
+    # so it is not pruned again after a few more playouts.
+    kPruneRatio = 0.75
+
+    def _limitTree(self):
+        """Prune the tree if it holds more nodes than the node limit (see
+        max_nodes and max_bytes of MCTS), counting the nodes freed in
+        num_pruned_nodes.
+        """
+        if self._node_limit is not None and self._tree.num_nodes > self._node_limit:
+            self._num_pruned_nodes += self._tree.prune(int(self._node_limit * self.kPruneRatio))
+
+    # no progressive widening unless top_k is given, see MCTSWithDNN
+    _top_k = None
+
+    def _width(self, node):
+        """The number of children of node that select may choose from: the
+        top_k children by prior, plus widen_rate * vis_times ** widen_exponent
+        more as node is visited. None for all of them.
+        """
+        if self._top_k is None:
+            return None
+        return self._top_k + int(self._widen_rate * self._tree.visTimes(node) ** self._widen_exponent)
+
+    def _expand(self, node, action_priors):
+        """Expand node, with its children sorted by prior, highest first,
+        and only the first _width(node) of them opened if progressive
+        widening is used.
+        """
+        if self._top_k is None:
+            self._tree.expand(node, action_priors)
+        else:
+            action_priors = sorted(action_priors, key=operator.itemgetter(1), reverse=True)
+            self._tree.expand(node, action_priors, self._width(node))
+
+    # MCTS-Solver, see solver of MCTS
+    _solver = False
+
+    def _provenMove(self):
+        """The root child proven won if solver is used, else None.
+        """
+        if not self._solver:
+            return None
+        return self._tree.winningMove()
+
+    # the SearchStats of the running search, and of the last one
+    _stats = None
+    _last_stats = None
+    _collect_stats = False
+    _stats_callback = None
+
+    def _startStats(self):
+        """Start collecting the SearchStats of a getMove, if collect_stats.
+        """
+        if self._collect_stats:
+            self._stats = SearchStats(self._tree.num_nodes, self._num_pruned_nodes)
+
+    def _finishStats(self):
+        """Finish the SearchStats of a getMove and pass them to the
+        stats_callback.
+        """
+        stats = self._stats
+        if stats is None:
+            return
+        self._stats = None
+        stats.finish(self._tree.num_nodes, self._num_pruned_nodes)
+        self._last_stats = stats
+        if self._stats_callback is not None:
+            self._stats_callback(stats)
+
+    @property
+    def stats(self):
+        """The SearchStats of the last getMove, None if they are not collected.
+        """
+        return self._last_stats
+
+    # playouts between two checks for the end of pondering
+    kPonderChunk = 8
+    _ponder_thread = None
+
+    def _numPlayouts(self):
+        """The number of playouts for getMove: compute_budget, less the
+        visits of the root kept from earlier searches if count_reused.
+        """
+        if not self._count_reused:
+            return self._compute_budget
+        return max(self._compute_budget - self._tree.visTimes(self._tree.root), 1)
+
+    def startPondering(self, state, max_playouts=None):
+        """Keep searching from state in a background thread until
+        stopPondering is called, or max_playouts (compute_budget by
+        default) playouts are done.
+
+        state is searched in place, so it must not be used until
+        stopPondering returns, and neither must this search, except for
+        updateWithMove and reset, which stop pondering first. When the
+        opponent's move arrives, updateWithMove keeps its subtree.
+        """
+        self.stopPondering()
+        if max_playouts is None:
+            max_playouts = self._compute_budget
+        stop = threading.Event()
+        result = {"num_playouts": 0, "error": None}
+
+        def ponder():
+            try:
+                while not stop.is_set() and result["num_playouts"] < max_playouts:
+                    result["num_playouts"] += self._runPlayouts(
+                        state, min(self.kPonderChunk, max_playouts - result["num_playouts"]))
+            except Exception as error:
+                result["error"] = error
+
+        self._ponder_thread = threading.Thread(target=ponder)
+        self._ponder_thread.daemon = True
+        self._ponder_stop = stop
+        self._ponder_result = result
+        self._ponder_thread.start()
+
+    def stopPondering(self):
+        """Stop the search started by startPondering and return the number
+        of playouts it ran, 0 if not pondering.
+        """
+        if self._ponder_thread is None:
+            return 0
+        self._ponder_stop.set()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        if self._ponder_result["error"] is not None:
+            raise self._ponder_result["error"]
+        return self._ponder_result["num_playouts"]
+
+    @property
+    def pondering(self):
+        return self._ponder_thread is not None
+
+    def close(self):
+        """Release what the search holds beyond its tree, stopping pondering.
+        """
+        self.stopPondering()
+
+    @property
+    def num_nodes(self):
+        return self._tree.num_nodes
+
+    @property
+    def num_pruned_nodes(self):
+        """The number of nodes freed by pruning so far.
+        """
+        return self._num_pruned_nodes
+
+    def _stopSearch(self, num_done, num_left, start, deadline, check_lead=True):
+        """Return True if a search that ran num_done playouts since start,
+        with num_left playouts of its budget left, should stop now.
+
+        It stops at the deadline (a time.time(), or None), and with
+        early_stop when the most visited root child can not be overtaken
+        any more (see _leadIsSafe). With a deadline, the playouts left are
+        also bounded by the ones that fit in the remaining time at the
+        rate so far. With solver, it stops once the root is proven. The
+        search never stops before the root is expanded.
+        """
+        if self._solver and self._tree.proven(self._tree.root):
+            return True
+        if deadline is None and not self._early_stop:
+            return False
+        tree = self._tree
+        if tree.isLeaf(tree.root):
+            return False
+        if deadline is not None:
+            now = time.time()
+            if now >= deadline:
+                return True
+            if now > start:
+                num_left = min(num_left, int((deadline - now) * num_done / (now - start)))
+        return self._early_stop and check_lead and _leadIsSafe(tree.rootChildren(), num_left)
+
     @abc.abstractmethod
     def _playout(self, state):
         """Run a single playout from the root to the leaf, getting a value at
         the leaf and propagating it back through its parents.
-        State is modified in-place, so a copy must be provided.
+        Moves are played on state in-place and taken back before returning.
         """
         pass
 
@@ -123,47 +330,204 @@ class TreeSearch(object):
         pass
 
 
+def _withVirtualLoss(vis_times, Q, virtual_loss):
+    """The visit times and Q values of children with virtual_loss pending
+    playouts each, every pending playout counted as a lost game.
+    """
+    total = vis_times + virtual_loss
+    return total, (Q * vis_times - virtual_loss) / np.maximum(total, 1)
+
+
 class MCTSTreeNode(TreeNode):
     """A node in the MCTS tree. Each node keeps track of its own value Q,
     prior probability P, and its visit-count-adjusted prior score u.
 
+    Children are created lazily: expand only stores the actions and
+    priors of the children in arrays, along with the visit times and Q
+    values of the children, which the children keep up to date. select
+    scores all children from these arrays at once, a child that has never
+    been selected has no visits and Q = 0 (its first play urgency), and
+    its node is only created when select picks it for the first time.
+
     Attributes:
         parent: The parent node for current node. Root's parent is None.
-        children: A dict whose key is action and value is corresponding child node.
+        children: A dict whose key is action and value is corresponding child node,
+            only holds the children selected so far.
         _vis_times: An integer shows the number of times this node has been visited.
         _Q: Q value, the quality value. Judge the value for exploitation for a node.
         _U: U value. Judge the value for exploration for a node. A node with more 
             visit times will have small U value.
         _P: The prior probability for a node to be exploration(or the 
             prior probability for its corresponding action to be taken).
+        _actions, _priors, _child_vis, _child_Q: The action, prior, vis_times
+            and Q of every child, None before expand.
+        _index: The position of this node in the child arrays of its parent.
+        _virtual_loss: The number of pending playouts through this node, see
+            addVirtualLoss. _child_vl holds it for every child and
+            _num_child_vl is its sum over the children.
+        _key: The hash of the position if the node was stored in a
+            TranspositionTable, else None.
+        _evaluation: The cached (action_priors, value) of the position, only
+            kept with a transposition table and until the node is expanded.
+        _proven: 1 if the game is proven won for the player choosing this
+            node, -1 if proven lost, 0 if unknown, see prove. _child_proven
+            holds it for every child and _num_lost counts the lost children.
+        _pending: The (action, prior) pairs of the children not opened yet
+            with progressive widening, highest prior first, or None. The
+            child arrays only hold the opened children, see select.
     """
 
-    def __init__(self, parent, prior_prob):
+    def __init__(self, parent, prior_prob, index=0):
         self.parent = parent
         self.children = {}  # a map from action to node
         self._vis_times = 0
         self._Q = 0  # Q = sum_{all rollout}(rollout_result)/vis_times
         self._U = 0  # U = prior_prob / (1 + vis_times)
         self._P = prior_prob
-
-    def expand(self, action_priors):
-        """Expand this node by creating all its children.
+        self._actions = None
+        self._priors = None
+        self._child_vis = None
+        self._child_Q = None
+        self._index = index
+        self._virtual_loss = 0
+        self._child_vl = None
+        self._num_child_vl = 0
+        self._key = None
+        self._evaluation = None
+        self._proven = 0
+        self._child_proven = None
+        self._num_lost = 0
+        self._pending = None
+
+    def expand(self, action_priors, width=None):
+        """Expand this node with all its children, their nodes are created by select.
 
         Args:
             action_priors: the (action, prior probability) list for its children node.
+            width: If not None, action_priors is sorted by prior, highest
+                first, and only the first width children are opened, select
+                opens the others as its width grows.
         """
-        for action, prob in action_priors:
-            if action not in self.children:
-                self.children[action] = MCTSTreeNode(self, prob)
-
-    def select(self, weight_c):
+        if self._actions is not None:
+            return
+        action_priors = list(action_priors)
+        if not action_priors:
+            return
+        if width is not None and width < len(action_priors):
+            self._pending = action_priors[width:]
+            action_priors = action_priors[:width]
+        actions, priors = zip(*action_priors)
+        self._actions = list(actions)
+        self._priors = np.array(priors, dtype=np.float64)
+        self._child_vis = np.zeros(len(actions), dtype=np.int64)
+        self._child_Q = np.zeros(len(actions), dtype=np.float64)
+        self._child_vl = np.zeros(len(actions), dtype=np.int64)
+        self._child_proven = np.zeros(len(actions), dtype=np.int8)
+
+    def select(self, weight_c, width=None):
         """Select action among children that gives maximum action value Q
-        plus bonus u(P).
+        plus bonus u(P), never a child proven lost unless all are. If width
+        is not None, only the first width children are considered, not
+        counting the lost ones, and children are opened until there are
+        that many.
 
         Return: A tuple of (action, next_node)
         """
-        return max(self.children.items(),
-                   key=lambda act_node: act_node[1].evaluate(weight_c))
+        if self._pending and width is not None and width + self._num_lost > len(self._actions):
+            self._widen(width + self._num_lost - len(self._actions))
+        child_vis, child_Q, priors = self._child_vis, self._child_Q, self._priors
+        child_vl, child_proven, vis_times = self._child_vl, self._child_proven, self._vis_times
+        if width is not None and width + self._num_lost < len(priors):
+            width += self._num_lost
+            child_vis, child_Q, priors = child_vis[:width], child_Q[:width], priors[:width]
+            child_vl, child_proven = child_vl[:width], child_proven[:width]
+        if self._num_child_vl:
+            child_vis, child_Q = _withVirtualLoss(child_vis, child_Q, child_vl)
+            vis_times += self._virtual_loss
+        U = priors * np.sqrt(vis_times) / (1 + child_vis)
+        score = child_Q + weight_c * U
+        if self._num_lost:
+            score[child_proven < 0] = -np.inf
+        index = int(np.argmax(score))
+        action = self._actions[index]
+        child = self.children.get(action)
+        if child is None:
+            child = MCTSTreeNode(self, self._priors[index], index)
+            self.children[action] = child
+        else:
+            # a node shared through a transposition table has several parents,
+            # parent and _index always follow the path of the current playout
+            child.parent = self
+            child._index = index
+        return action, child
+
+    def _widen(self, num_children):
+        """Open the next num_children pending children.
+        """
+        opened, self._pending = self._pending[:num_children], self._pending[num_children:] or None
+        actions, priors = zip(*opened)
+        num_opened = len(actions)
+        self._actions.extend(actions)
+        self._priors = np.concatenate((self._priors, priors))
+        self._child_vis = np.concatenate((self._child_vis, np.zeros(num_opened, dtype=np.int64)))
+        self._child_Q = np.concatenate((self._child_Q, np.zeros(num_opened, dtype=np.float64)))
+        self._child_vl = np.concatenate((self._child_vl, np.zeros(num_opened, dtype=np.int64)))
+        self._child_proven = np.concatenate((self._child_proven, np.zeros(num_opened, dtype=np.int8)))
+
+    def numChildren(self):
+        """The number of children, opened or not.
+        """
+        if self._actions is None:
+            return 0
+        return len(self._actions) + (len(self._pending) if self._pending else 0)
+
+    def addVirtualLoss(self, delta):
+        """Add delta pending playouts to this node and all nodes above it.
+        """
+        node = self
+        while node is not None:
+            node._virtual_loss += delta
+            parent = node.parent
+            if parent is not None:
+                parent._child_vl[node._index] = node._virtual_loss
+                parent._num_child_vl += delta
+            node = parent
+
+    def prove(self, result):
+        """Mark this node proven, result is 1 if the player choosing it wins
+        and -1 if they lose, and pass the proof up the tree (MCTS-Solver):
+        a node with a won child is lost for the player choosing it, and a
+        node whose children are all lost is won.
+        """
+        node = self
+        node._proven = result
+        while node.parent is not None:
+            parent = node.parent
+            if parent._child_proven[node._index]:
+                break  # the parent knows already
+            parent._child_proven[node._index] = node._proven
+            if node._proven > 0:
+                result = -1
+            else:
+                parent._num_lost += 1
+                if parent._num_lost < parent.numChildren():
+                    break
+                result = 1
+            if parent._proven:
+                break
+            parent._proven = result
+            node = parent
+
+    def childVisits(self):
+        """Return a list of (action, vis_times) for all children, in the
+        order they were given to expand, the ones not opened yet unvisited.
+        """
+        if self._actions is None:
+            return []
+        visits = list(zip(self._actions, self._child_vis.tolist()))
+        if self._pending:
+            visits.extend((action, 0) for action, _ in self._pending)
+        return visits
 
     def update(self, bp_value):
         """Update node values from leaf evaluation.
@@ -188,6 +552,9 @@ class MCTSTreeNode(TreeNode):
         #   = (v_{N+1} - Q_{N}) / (N+1)
 
         self._Q += float(bp_value - self._Q) / self._vis_times
+        if self.parent is not None:
+            self.parent._child_vis[self._index] = self._vis_times
+            self.parent._child_Q[self._index] = self._Q
 
     def backPropagation(self, bp_value):
         """Backpropagation the final result from leaf to the root.
@@ -211,7 +578,7 @@ class MCTSTreeNode(TreeNode):
         return self._Q + weight_c * self._U
 
     def is_leaf(self):
-        return False if self.children else True
+        return self._actions is None
 
     def is_root(self):
         return self.parent is None
@@ -225,6 +592,669 @@ class MCTSTreeNode(TreeNode):
         return self._Q
 
 
+@six.add_metaclass(abc.ABCMeta)
+class Tree(object):
+    """The abstract class for the storage of a search tree.
+
+    Nodes are handles given out by the tree (the root, or the result of
+    select), searches only pass them back to the tree.
+    """
+    @abc.abstractmethod
+    def isLeaf(self, node):
+        pass
+
+    @abc.abstractmethod
+    def select(self, node, weight_c, width=None):
+        """Select action among children of node, only among the first width
+        children (in the order given to expand) if width is not None.
+
+        Return:
+            A tuple, (action, next_node)
+        """
+        pass
+
+    @abc.abstractmethod
+    def expand(self, node, action_priors, width=None):
+        """Create the children of a leaf from (action, prior probability) pairs.
+        If width is not None, the pairs are sorted by prior, highest first,
+        and the tree may keep only the first width children until select
+        is given a larger width.
+        """
+        pass
+
+    @abc.abstractmethod
+    def visTimes(self, node):
+        pass
+
+    @abc.abstractmethod
+    def backPropagation(self, node, bp_value):
+        """Update node with bp_value and every node above it, flipping the
+        sign at every level.
+        """
+        pass
+
+    @abc.abstractmethod
+    def addVirtualLoss(self, node, delta):
+        """Add delta (or remove -delta) pending playouts on the path from the
+        root to node. Until they are removed, select counts every pending
+        playout as a visit lost by the player choosing the node, so the
+        playouts selected in a batch spread over different leaves.
+        """
+        pass
+
+    @abc.abstractmethod
+    def rootChildren(self):
+        """Return a list of (action, vis_times) for the children of the root.
+        """
+        pass
+
+    @abc.abstractmethod
+    def proven(self, node):
+        """1 if node is proven won for the player choosing it, -1 if proven
+        lost, 0 if unknown.
+        """
+        pass
+
+    @abc.abstractmethod
+    def prove(self, node, result):
+        """Mark node proven with result (see proven) and update the proofs
+        of the nodes above it, see MCTSTreeNode.prove.
+        """
+        pass
+
+    @abc.abstractmethod
+    def winningMove(self):
+        """Return the action of a root child proven won, None if there is none.
+        """
+        pass
+
+    @abc.abstractmethod
+    def updateWithMove(self, last_move):
+        """Make the child of last_move the root, keeping its subtree.
+        """
+        pass
+
+    @abc.abstractmethod
+    def reset(self):
+        pass
+
+    @abc.abstractproperty
+    def num_nodes(self):
+        """The number of nodes, counting every opened child of an expanded
+        node whether or not its node object exists. kNodeBytes is about
+        the memory taken per node.
+        """
+        pass
+
+    @abc.abstractmethod
+    def prune(self, max_nodes):
+        """Turn expanded nodes back into leaves, lowest vis_times first,
+        until at most max_nodes nodes are left. The root is never pruned
+        and the pruned nodes keep their own statistics. Must not be
+        called with virtual loss pending. Return the number of nodes freed.
+        """
+        pass
+
+    def transpose(self, node, state):
+        """Called once the move leading to node is played on state. Return
+        the node to go on with, e.g. the node already stored for the same
+        position. Trees without transpositions return node.
+        """
+        return node
+
+    def cachedEvaluation(self, node):
+        """Return the (action_priors, value) cached by cacheEvaluation, or None.
+        """
+        return None
+
+    def cacheEvaluation(self, node, evaluation):
+        pass
+
+
+class TranspositionTable(object):
+    """A fixed size table from position hash (Board.zobrist_hash) to node.
+
+    The entry of a hash lives in slot hash % size, a new entry always
+    replaces the one in its slot.
+
+    Attributes:
+        lookups, hits: The number of lookups and of lookups finding a node.
+        stores, replacements: The number of nodes stored and of stores
+            replacing the entry of another position.
+    """
+
+    def __init__(self, size):
+        self.__size = int(size)
+        self.clear()
+
+    def clear(self):
+        self.__keys = [None] * self.__size
+        self.__nodes = [None] * self.__size
+        self.lookups = 0
+        self.hits = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def lookup(self, key):
+        self.lookups += 1
+        slot = key % self.__size
+        if self.__keys[slot] == key:
+            self.hits += 1
+            return self.__nodes[slot]
+        return None
+
+    def store(self, key, node):
+        slot = key % self.__size
+        if self.__keys[slot] is not None and self.__keys[slot] != key:
+            self.replacements += 1
+        self.stores += 1
+        self.__keys[slot] = key
+        self.__nodes[slot] = node
+
+    def discard(self, key, node):
+        """Remove the entry of key if it holds node.
+        """
+        slot = key % self.__size
+        if self.__keys[slot] == key and self.__nodes[slot] is node:
+            self.__keys[slot] = None
+            self.__nodes[slot] = None
+
+    def retain(self, node_ids):
+        """Remove the entries whose node is not in node_ids, a set of id(node).
+        """
+        for slot, node in enumerate(self.__nodes):
+            if node is not None and id(node) not in node_ids:
+                self.__keys[slot] = None
+                self.__nodes[slot] = None
+
+    def nodes(self):
+        """Return the stored nodes.
+        """
+        return [node for node in self.__nodes if node is not None]
+
+    @property
+    def hit_rate(self):
+        return float(self.hits) / self.lookups if self.lookups else 0.0
+
+    @property
+    def size(self):
+        return self.__size
+
+    def __str__(self):
+        return "TranspositionTable(size={}, lookups={}, hits={}, hit rate={:.3f}, replacements={})".format(
+            self.__size, self.lookups, self.hits, self.hit_rate, self.replacements)
+
+    __repr__ = __str__
+
+
+class NodeTree(Tree):
+    """Tree storage with one MCTSTreeNode object per node.
+
+    With a transposition table, the nodes of positions reached by several
+    move orders are shared, so the tree becomes a DAG. A shared node
+    keeps one set of statistics, the parent it is reached from on the
+    current playout gets them on backpropagation, its other parents see
+    them the next time they go through it. The positions also share
+    their evaluation until the node is expanded. Shared nodes need the
+    path of a single playout at a time, so a table can not be combined
+    with virtual loss (batches or threads).
+
+    Attributes:
+        table: The TranspositionTable, or None.
+    """
+    # about the bytes per node, measured with tracemalloc on 15x15
+    kNodeBytes = 56
+
+    def __init__(self, transposition_size=0):
+        self.root = MCTSTreeNode(None, 1.0)
+        self.table = TranspositionTable(transposition_size) if transposition_size else None
+        self.__num_nodes = 1
+
+    def isLeaf(self, node):
+        return node.is_leaf()
+
+    def select(self, node, weight_c, width=None):
+        num_opened = len(node._actions)
+        action, child = node.select(weight_c, width)
+        self.__num_nodes += len(node._actions) - num_opened
+        return action, child
+
+    def expand(self, node, action_priors, width=None):
+        if node._actions is None:
+            node.expand(action_priors, width)
+            if node._actions is not None:
+                self.__num_nodes += len(node._actions)
+        node._evaluation = None
+
+    def visTimes(self, node):
+        return node.vis_times
+
+    def backPropagation(self, node, bp_value):
+        node.backPropagation(bp_value)
+
+    def addVirtualLoss(self, node, delta):
+        node.addVirtualLoss(delta)
+
+    def rootChildren(self):
+        return self.root.childVisits()
+
+    def proven(self, node):
+        return node._proven
+
+    def prove(self, node, result):
+        node.prove(result)
+
+    def winningMove(self):
+        root = self.root
+        if root._proven >= 0:
+            return None
+        return root._actions[int(np.argmax(root._child_proven))]
+
+    def updateWithMove(self, last_move):
+        if last_move in self.root.children:  # if can reuse
+            self.root = self.root.children[last_move]
+            self.root.parent = None
+            self.__num_nodes = 1 + sum(len(node._actions) for node in self.__expandedNodes(self.root))
+        else:   # else rebuild the tree
+            self.root = MCTSTreeNode(None, 1.0)
+            self.__num_nodes = 1
+        if self.table is not None:
+            # entries of the dropped subtrees would keep them alive, and
+            # transpose could link them back without them being counted
+            self.table.retain(self.__liveNodes(self.root))
+
+    def reset(self):
+        self.root = MCTSTreeNode(None, 1.0)
+        self.__num_nodes = 1
+        if self.table is not None:
+            self.table.clear()
+
+    @staticmethod
+    def __liveNodes(node):
+        """The ids of node and of every node object below it.
+        """
+        live = {id(node)}
+        stack = [node]
+        while stack:
+            for child in stack.pop().children.values():
+                if id(child) not in live:
+                    live.add(id(child))
+                    stack.append(child)
+        return live
+
+    @staticmethod
+    def __expandedNodes(node):
+        """The expanded nodes below node (and node itself if expanded),
+        every node after its parent.
+        """
+        expanded = [node] if node._actions is not None else []
+        seen = set()
+        stack = [node]
+        while stack:
+            for child in stack.pop().children.values():
+                if child._actions is not None and id(child) not in seen:
+                    seen.add(id(child))
+                    expanded.append(child)
+                    stack.append(child)
+        return expanded
+
+    @property
+    def num_nodes(self):
+        return self.__num_nodes
+
+    def prune(self, max_nodes):
+        num_nodes = self.__num_nodes
+        if num_nodes <= max_nodes:
+            return 0
+        expanded = self.__expandedNodes(self.root)[1:]
+        # number of nodes below every expanded node
+        sizes = {id(node): len(node._actions) for node in expanded}
+        for node in reversed(expanded):
+            if node.parent is not None and id(node.parent) in sizes:
+                sizes[id(node.parent)] += sizes[id(node)]
+        # lowest vis_times first, children before parents on a tie
+        order = sorted(range(len(expanded)), key=lambda i: (expanded[i]._vis_times, -i))
+        for i in order:
+            if num_nodes <= max_nodes:
+                break
+            node = expanded[i]
+            freed = sizes[id(node)]
+            num_nodes -= freed
+            ancestor = node.parent
+            while ancestor is not None and id(ancestor) in sizes:
+                sizes[id(ancestor)] -= freed
+                ancestor = ancestor.parent
+            self.__collapse(node)
+        freed, self.__num_nodes = self.__num_nodes - num_nodes, num_nodes
+        return freed
+
+    def __collapse(self, node):
+        """Make node a leaf again, dropping its subtree.
+        """
+        if self.table is not None:
+            stack = list(node.children.values())
+            while stack:
+                child = stack.pop()
+                if child._key is not None:
+                    self.table.discard(child._key, child)
+                stack.extend(child.children.values())
+        node.children = {}
+        node._actions = None
+        node._priors = None
+        node._child_vis = None
+        node._child_Q = None
+        node._child_vl = None
+        node._num_child_vl = 0
+        node._child_proven = None
+        node._num_lost = 0
+        node._pending = None
+
+    def transpose(self, node, state):
+        if self.table is None or node._key is not None:
+            return node
+        key = state.zobrist_hash
+        other = self.table.lookup(key)
+        if other is None or other is node:
+            self.table.store(key, node)
+            node._key = key
+            return node
+        # link the stored node in place of the new one
+        parent, index = node.parent, node._index
+        parent.children[parent._actions[index]] = other
+        other.parent = parent
+        other._index = index
+        parent._child_vis[index] = other._vis_times
+        parent._child_Q[index] = other._Q
+        if other._proven:
+            other.prove(other._proven)
+        return other
+
+    def cachedEvaluation(self, node):
+        return node._evaluation
+
+    def cacheEvaluation(self, node, evaluation):
+        if self.table is not None:
+            node._evaluation = evaluation
+
+
+class ArrayTree(Tree):
+    """Tree storage as a struct of numpy arrays, nodes are indices.
+
+    The children of a node sit next to each other, in the index range
+    [child_start[node], child_start[node] + child_count[node]), so select
+    scores all children of a node with one vectorized expression. Scores
+    are computed with the same operations as MCTSTreeNode, so both
+    storages lead to the same search.
+
+    The arrays grow by doubling. updateWithMove copies the kept subtree
+    to the front of the arrays, so nodes of old moves do not pile up.
+    """
+    kInitCapacity = 1024
+    # bytes per node in use, the capacity can be up to twice the nodes in use
+    kNodeBytes = 53
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        capacity = ArrayTree.kInitCapacity
+        self.__action = np.zeros(capacity, dtype=np.int32)
+        self.__parent = np.zeros(capacity, dtype=np.int32)
+        self.__child_start = np.zeros(capacity, dtype=np.int32)
+        self.__child_count = np.zeros(capacity, dtype=np.int32)
+        self.__vis_times = np.zeros(capacity, dtype=np.int64)
+        self.__Q = np.zeros(capacity, dtype=np.float64)
+        self.__P = np.zeros(capacity, dtype=np.float64)
+        self.__virtual_loss = np.zeros(capacity, dtype=np.int64)
+        self.__proven = np.zeros(capacity, dtype=np.int8)
+        self.__num_lost = np.zeros(capacity, dtype=np.int32)
+        self.__num_virtual_loss = 0
+        self.__parent[0] = -1
+        self.__P[0] = 1.0
+        self.__size = 1
+        self.root = 0
+
+    def __reserve(self, num_nodes):
+        """Make room for num_nodes more nodes.
+        """
+        capacity = len(self.__action)
+        if self.__size + num_nodes <= capacity:
+            return
+        capacity = max(2 * capacity, self.__size + num_nodes)
+
+        def grow(array):
+            new_array = np.zeros(capacity, dtype=array.dtype)
+            new_array[:self.__size] = array[:self.__size]
+            return new_array
+        self.__action = grow(self.__action)
+        self.__parent = grow(self.__parent)
+        self.__child_start = grow(self.__child_start)
+        self.__child_count = grow(self.__child_count)
+        self.__vis_times = grow(self.__vis_times)
+        self.__Q = grow(self.__Q)
+        self.__P = grow(self.__P)
+        self.__virtual_loss = grow(self.__virtual_loss)
+        self.__proven = grow(self.__proven)
+        self.__num_lost = grow(self.__num_lost)
+
+    def isLeaf(self, node):
+        return self.__child_count[node] == 0
+
+    def select(self, node, weight_c, width=None):
+        start = self.__child_start[node]
+        end = start + self.__child_count[node]
+        num_lost = self.__num_lost[node]
+        if width is not None:
+            end = min(end, start + width + num_lost)
+        child_vis, child_Q, vis_times = self.__vis_times[start:end], self.__Q[start:end], self.__vis_times[node]
+        if self.__num_virtual_loss:
+            child_vis, child_Q = _withVirtualLoss(child_vis, child_Q, self.__virtual_loss[start:end])
+            vis_times += self.__virtual_loss[node]
+        U = self.__P[start:end] * np.sqrt(vis_times) / (1 + child_vis)
+        score = child_Q + weight_c * U
+        if num_lost:
+            score[self.__proven[start:end] < 0] = -np.inf
+        child = start + int(np.argmax(score))
+        return int(self.__action[child]), child
+
+    def expand(self, node, action_priors, width=None):
+        # every child gets its slot, the children of a node have to stay
+        # next to each other, so there is no progressive widening
+        if self.__child_count[node]:
+            return
+        action_priors = list(action_priors)
+        if not action_priors:
+            return
+        actions, probs = zip(*action_priors)
+        num_children = len(actions)
+        self.__reserve(num_children)
+        start, end = self.__size, self.__size + num_children
+        self.__action[start:end] = actions
+        self.__parent[start:end] = node
+        self.__P[start:end] = probs
+        # slots past the end may hold stale nodes left by __compact
+        self.__child_start[start:end] = 0
+        self.__child_count[start:end] = 0
+        self.__vis_times[start:end] = 0
+        self.__Q[start:end] = 0
+        self.__virtual_loss[start:end] = 0
+        self.__proven[start:end] = 0
+        self.__num_lost[start:end] = 0
+        self.__child_start[node] = start
+        self.__child_count[node] = num_children
+        self.__size = end
+
+    def visTimes(self, node):
+        return int(self.__vis_times[node])
+
+    def __path(self, node):
+        """Nodes from node up to the root.
+        """
+        path = []
+        while node >= 0:
+            path.append(node)
+            node = self.__parent[node]
+        return path
+
+    def addVirtualLoss(self, node, delta):
+        path = self.__path(node)
+        self.__virtual_loss[path] += delta
+        self.__num_virtual_loss += delta * len(path)
+
+    def backPropagation(self, node, bp_value):
+        path = self.__path(node)
+        # NOTE: '-' --> good result for one player means bad result for the other.
+        values = float(bp_value) * (1 - 2 * (np.arange(len(path)) % 2))
+        self.__vis_times[path] += 1
+        self.__Q[path] += (values - self.__Q[path]) / self.__vis_times[path]
+
+    def rootChildren(self):
+        start = self.__child_start[self.root]
+        end = start + self.__child_count[self.root]
+        return list(zip(self.__action[start:end].tolist(), self.__vis_times[start:end].tolist()))
+
+    def proven(self, node):
+        return int(self.__proven[node])
+
+    def prove(self, node, result):
+        # the proven value of a node is also the one its parent sees
+        proven, num_lost, parent = self.__proven, self.__num_lost, self.__parent
+        while not proven[node]:
+            proven[node] = result
+            if parent[node] < 0:
+                break
+            node = parent[node]
+            if result > 0:
+                result = -1
+            else:
+                num_lost[node] += 1
+                if num_lost[node] < self.__child_count[node]:
+                    break
+                result = 1
+
+    def winningMove(self):
+        root = self.root
+        if self.__proven[root] >= 0:
+            return None
+        start = self.__child_start[root]
+        end = start + self.__child_count[root]
+        return int(self.__action[start + int(np.argmax(self.__proven[start:end]))])
+
+    def updateWithMove(self, last_move):
+        start = self.__child_start[self.root]
+        end = start + self.__child_count[self.root]
+        found = np.flatnonzero(self.__action[start:end] == last_move)
+        if found.size:
+            self.__compact(start + int(found[0]))
+        else:
+            self.reset()
+
+    def __compact(self, new_root):
+        """Keep only the subtree of new_root, moved to the front of the arrays.
+
+        Nodes are renumbered in breadth first order, which keeps the
+        children of every node next to each other.
+        """
+        order = [np.array([new_root])]
+        level = order[0]
+        while True:
+            counts = self.__child_count[level]
+            starts = self.__child_start[level][counts > 0]
+            counts = counts[counts > 0]
+            if not counts.size:
+                break
+            # concatenation of the ranges [start, start + count)
+            offsets = np.cumsum(counts) - counts
+            level = np.repeat(starts - offsets, counts) + np.arange(np.sum(counts))
+            order.append(level)
+        old = np.concatenate(order)
+        size = len(old)
+        new_index = np.zeros(self.__size, dtype=np.int32)
+        new_index[old] = np.arange(size)
+
+        child_count = self.__child_count[old]
+        child_start = np.where(child_count > 0, new_index[self.__child_start[old]], 0)
+        parent = new_index[self.__parent[old]]
+        parent[0] = -1
+        self.__action[:size] = self.__action[old]
+        self.__vis_times[:size] = self.__vis_times[old]
+        self.__Q[:size] = self.__Q[old]
+        self.__P[:size] = self.__P[old]
+        self.__virtual_loss[:size] = self.__virtual_loss[old]
+        self.__proven[:size] = self.__proven[old]
+        # a pruned node has no children left to be lost
+        self.__num_lost[:size] = np.where(child_count > 0, self.__num_lost[old], 0)
+        self.__child_start[:size] = child_start
+        self.__child_count[:size] = child_count
+        self.__parent[:size] = parent
+        self.__size = size
+        self.root = 0
+
+    @property
+    def num_nodes(self):
+        return self.__size
+
+    def prune(self, max_nodes):
+        size = self.__size
+        if size <= max_nodes:
+            return 0
+        root, parent, child_count = self.root, self.__parent, self.__child_count
+        # children are always stored after their parent
+        expanded = np.flatnonzero(child_count[:size])
+        expanded = expanded[expanded != root]
+        # number of nodes below every node
+        sizes = child_count[:size].astype(np.int64)
+        for node in expanded[::-1].tolist():
+            sizes[parent[node]] += sizes[node]
+        # lowest vis_times first, children before parents on a tie
+        order = np.lexsort((-expanded, self.__vis_times[expanded]))
+        num_nodes = size
+        for node in expanded[order].tolist():
+            if num_nodes <= max_nodes:
+                break
+            freed = sizes[node]
+            num_nodes -= freed
+            ancestor = parent[node]
+            while ancestor != root:
+                sizes[ancestor] -= freed
+                ancestor = parent[ancestor]
+            child_count[node] = 0
+        self.__compact(root)
+        return size - self.__size
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays, including the unused capacity.
+        """
+        return sum(array.nbytes for array in (
+            self.__action, self.__parent, self.__child_start, self.__child_count,
+            self.__vis_times, self.__Q, self.__P, self.__virtual_loss,
+            self.__proven, self.__num_lost))
+
+
+def _nodeLimit(tree, max_nodes, max_bytes):
+    """The node limit of tree from max_nodes and max_bytes, None for no limit.
+    """
+    limits = []
+    if max_nodes is not None:
+        limits.append(int(max_nodes))
+    if max_bytes is not None:
+        limits.append(int(max_bytes) // tree.kNodeBytes)
+    return min(limits) if limits else None
+
+
+def _makeTree(tree_backend, transposition_size=0):
+    """Create the tree storage named by tree_backend, "node" or "array".
+    """
+    if tree_backend == "node":
+        return NodeTree(transposition_size)
+    if tree_backend == "array":
+        if transposition_size:
+            raise ValueError("Transposition tables need the node tree backend.")
+        return ArrayTree()
+    raise ValueError("Unknown tree backend: {}".format(tree_backend))
+
+
 class MCTS(TreeSearch):
     """
     The Monte Carlo Tree Search.
@@ -244,10 +1274,60 @@ class MCTS(TreeSearch):
         _compute_budget: How many times will we search in this tree (Num of playout).
         _silent: If True, MCTS will not print log informations.
         _expand_bound: Only expand a leaf node when its vis_times >= expand_bound
+        _tree: The storage of the search tree, see tree_backend.
     """
 
-    def __init__(self, expand_policy, rollout_policy, weight_c=5, compute_budget=10000, expand_bound=1, silent=False):
-        self.root = MCTSTreeNode(None, 1.0)
+    def __init__(self, expand_policy, rollout_policy, weight_c=5, compute_budget=10000, expand_bound=1,
+                 silent=False, tree_backend="node", transposition_size=0, early_stop=False,
+                 num_rollouts=1, fast_rollout=False, max_nodes=None, max_bytes=None,
+                 count_reused=False, collect_stats=False, stats_callback=None, solver=False):
+        """
+        tree_backend: "node" (default) keeps one MCTSTreeNode per node,
+            "array" keeps the tree in numpy arrays (ArrayTree), which is
+            faster and smaller for wide trees.
+        transposition_size: The number of slots of the transposition table
+            sharing the nodes of equal positions (see NodeTree), 0 (default)
+            for no table. Only for the "node" backend.
+        early_stop: If True, getMove stops as soon as the most visited root
+            child can not be overtaken within the compute budget (or time
+            limit) left, see TreeSearch._stopSearch.
+        num_rollouts: If greater than 1, the value of a leaf is the mean
+            outcome of this many uniformly random games played at once by
+            Rollout.batchRollout, rollout_policy is not used then.
+        fast_rollout: If True, a single rollout plays the shuffled empty
+            positions in order (Rollout.shuffledRollout) instead of asking
+            rollout_policy for every move, which is the same as a uniform
+            rollout_policy like rollout_policy_fn, only faster.
+        max_nodes, max_bytes: If not None, the most nodes, or bytes (see
+            kNodeBytes of the tree backends), the tree may hold. When the
+            tree grows past it, the subtrees of the least visited nodes are
+            pruned (see Tree.prune) until it is back to kPruneRatio of the
+            limit, which keeps the memory of long games bounded.
+        count_reused: If True, the visits of the root kept by updateWithMove,
+            e.g. from pondering (see startPondering), count toward the
+            compute budget of getMove.
+        collect_stats: If True, every getMove collects a SearchStats,
+            available from stats afterwards. Costs a few time.time calls
+            per playout, and next to nothing when off.
+        stats_callback: If not None, a function called with the SearchStats
+            at the end of every getMove, implies collect_stats.
+        solver: If True, the search proves wins and losses (MCTS-Solver,
+            see MCTSTreeNode.prove): a node whose move ends the game with a
+            win is proven, proofs go up the tree, select skips the moves
+            proven lost, and getMove plays a proven win at once. With
+            candidate moves (see Board candidateRadius), a loss is only
+            proven over the candidates.
+        """
+        self._tree = _makeTree(tree_backend, transposition_size)
+        self._solver = solver
+        self._collect_stats = collect_stats or stats_callback is not None
+        self._stats_callback = stats_callback
+        self._early_stop = early_stop
+        self._num_rollouts = max(int(num_rollouts), 1)
+        self._fast_rollout = fast_rollout
+        self._node_limit = _nodeLimit(self._tree, max_nodes, max_bytes)
+        self._num_pruned_nodes = 0
+        self._count_reused = count_reused
         self._expand_policy = expand_policy
         self._rollout_policy = rollout_policy
         self._weight_c = weight_c
@@ -256,31 +1336,84 @@ class MCTS(TreeSearch):
         self._expand_bound = min(expand_bound, compute_budget)
     
     def reset(self):
-        self.root = MCTSTreeNode(None, 1.0)
+        self.stopPondering()
+        self._tree.reset()
+
+    @property
+    def root(self):
+        return self._tree.root
+
+    @property
+    def transposition_table(self):
+        """The TranspositionTable of the tree, or None.
+        """
+        return getattr(self._tree, "table", None)
 
     def _playout(self, state):
         """Run a single playout from the root to the leaf, getting a value at
         the leaf and propagating it back through its parents.
-        State is modified in-place, so a copy must be provided.
+        Moves are played on state in-place and taken back before returning,
+        so no copy of state is needed.
         """
-        node = self.root
+        num_moves = len(state.moved)
+        try:
+            self._search(state)
+        finally:
+            rewind(state, num_moves)
+
+    def _search(self, state):
+        """The body of _playout. Leaves the moves it played on state.
+        """
+        tree = self._tree
+        stats = self._stats
+        if stats is not None:
+            tick = time.time()
+        node = tree.root
+        depth = 0
         while True:
-            if node.is_leaf():  # if leaf or only root in tree.
+            if tree.isLeaf(node):  # if leaf or only root in tree.
                 break
 
-            action, node = node.select(self._weight_c)
+            action, node = tree.select(node, self._weight_c)
             state.play(action)
+            node = tree.transpose(node, state)
+            depth += 1
+            if self._solver and tree.proven(node):
+                break
+        if stats is not None:
+            stats.addPlayout(depth)
+            tick = stats.lap("select", tick)
+        if self._solver and tree.proven(node):
+            # the outcome is known, no need to evaluate the leaf
+            tree.backPropagation(node, tree.proven(node))
+            return
 
         action_probs, _ = self._expand_policy(state)
+        if stats is not None:
+            tick = stats.lap("evaluate", tick)
         # Check for end of game
-        is_end, _ = state.gameEnd()
-        if not is_end and node.vis_times >= self._expand_bound:
-            node.expand(action_probs)
+        is_end, winner = state.gameEnd()
+        if not is_end and tree.visTimes(node) >= self._expand_bound:
+            tree.expand(node, action_probs)
+        elif self._solver and winner is not None:
+            # the winner is the player who just moved, choosing node
+            tree.prove(node, 1)
+        if stats is not None:
+            tick = stats.lap("expand", tick)
 
         # Evaluate the leaf node by random rollout
-        bp_value = self._evaluateRollout(state)
+        if self._num_rollouts > 1:
+            bp_value = batchRollout(state, self._num_rollouts).mean()
+        elif self._fast_rollout:
+            bp_value = shuffledRollout(state)
+        else:
+            bp_value = self._evaluateRollout(state)
+        if stats is not None:
+            tick = stats.lap("rollout", tick)
         # bp
-        node.backPropagation(-bp_value)
+        tree.backPropagation(node, -bp_value)
+        if stats is not None:
+            stats.lap("backpropagation", tick)
 
     def _evaluateRollout(self, state, limit=1000):
         """Use the rollout policy to play until the end of the game,
@@ -311,36 +1444,59 @@ class MCTS(TreeSearch):
         else:
             return 1 if winner_color == player_color else -1
 
-    def getMove(self, state):
+    def getMove(self, state, time_limit=None):
         """Runs all playouts sequentially and returns the most visited action.
         state: the current game state
+        time_limit: If not None, stop the search after time_limit milliseconds
+            even if the compute budget is not used up.
 
         Return: the selected action
         """
         # if at the beginning of game, we should put stone at center.
         if state.is_empty:
             return len(state.availables) // 2
+        # a win proven by the earlier searches needs no search
+        move = self._provenMove()
+        if move is not None:
+            return move
 
+        num_playouts = self._numPlayouts()
+        self._startStats()
         if self._silent:
-            for _ in range(self._compute_budget):
-                state_copy = copy.deepcopy(state)
-                self._playout(state_copy)
+            self._runPlayouts(state, num_playouts, deadline=_deadline(time_limit))
         else:
             print("Thinking...")
-            pb = ProgressBar(self._compute_budget, total_sharp=20)
-            for _ in range(self._compute_budget):
-                pb.iterStart()
-                state_copy = copy.deepcopy(state)
-                self._playout(state_copy)
-                pb.iterEnd()
-
-        return max(self.root.children.items(),
-                   key=lambda act_node: act_node[1].vis_times)[0]
-        # return max(self.root.children.items(),
-        #            key=lambda act_node: act_node[1].Q_value)[0]
+            pb = ProgressBar(num_playouts, total_sharp=20)
+            num_done = self._runPlayouts(state, num_playouts, pb, _deadline(time_limit))
+            if num_done < num_playouts:
+                print("\nStopped after {} playouts.".format(num_done))
+        self._finishStats()
+
+        move = self._provenMove()
+        if move is not None:
+            return move
+        return max(self._tree.rootChildren(),
+                   key=lambda act_vis: act_vis[1])[0]
+
+    def _runPlayouts(self, state, num_playouts, progress_bar=None, deadline=None):
+        """Run up to num_playouts playouts, see _stopSearch for when the
+        search stops earlier. Return the number of playouts run.
+        """
+        start = time.time()
+        for num_done in range(1, num_playouts + 1):
+            if progress_bar is not None:
+                progress_bar.iterStart()
+            self._playout(state)
+            self._limitTree()
+            if progress_bar is not None:
+                progress_bar.iterEnd()
+            if self._stopSearch(num_done, num_playouts - num_done, start, deadline,
+                                num_done % self.kStopCheckInterval == 0):
+                return num_done
+        return num_playouts
     
     def testOut(self):
-        return sorted(list(self.root.children.items()), key=lambda x: x[-1])
+        return sorted(self._tree.rootChildren(), key=lambda x: x[-1])
 
     def think(self, state, decay_level=100):
         """Consider the current board state and give a suggested move.
@@ -354,22 +1510,20 @@ class MCTS(TreeSearch):
                 A higher value means MCTS will pay less attention to this 'think action'.
         """
         for _ in range(self._compute_budget//decay_level):
-            state_copy = copy.deepcopy(state)
-            self._playout(state_copy)
-        return max(self.root.children.items(),
-                   key=lambda act_node: act_node[1].vis_times)[0]
+            self._playout(state)
+        self._limitTree()
+        return max(self._tree.rootChildren(),
+                   key=lambda act_vis: act_vis[1])[0]
 
     def updateWithMove(self, last_move):
-        """Reuse the Tree, and take a step forward.
+        """Reuse the Tree, and take a step forward. Stops pondering first.
         """
-        if last_move in self.root.children:  # if can reuse
-            self.root = self.root.children[last_move]
-            self.root.parent = None
-        else:   # else rebuild the tree
-            self.root = MCTSTreeNode(None, 1.0)
+        self.stopPondering()
+        self._tree.updateWithMove(last_move)
 
     def __str__(self):
-        return "MCTS with compute budget {} and weight c {}".format(self._compute_budget, self._weight_c)
+        return "MCTS with compute budget {}, weight c {} and {} rollouts per leaf".format(
+            self._compute_budget, self._weight_c, self._num_rollouts)
 
     @property
     def silent(self):
@@ -397,12 +1551,59 @@ class MCTSWithDNN(TreeSearch):
         _compute_budget: How many times will we search in this tree (Num of playout).
         _silent: If True, MCTS will not print log informations.
         _expand_bound: Only expand a leaf node when its vis_times >= expand_bound
+        _tree: The storage of the search tree, see tree_backend of MCTS.
+        _batch_size: How many leaves are evaluated together, see _playoutBatch.
+        _policy_value_batch_fn: A function that takes in a batch of states (the
+            stacked currentState of the leaves), the list of moves to expand at
+            every leaf and whether to renormalize the priors over these moves, and
+            outputs a list of (action, probability) lists and an array of values,
+            e.g. SimpleCNN.policyValueBatchFunc. Only needed if batch_size > 1.
+
+    transposition_size is the number of slots of the transposition table,
+    see MCTS. With a table, the positions reached by several move orders
+    also share their network evaluation. early_stop, max_nodes, max_bytes,
+    count_reused, collect_stats, stats_callback and solver are the same as
+    for MCTS, note that early_stop leaves the visit distribution returned by
+    getMove less settled, so it is not meant for self-play.
+
+    With top_k, nodes use progressive widening: the children are sorted
+    by prior and select only considers the top_k of them, plus
+    widen_rate * vis_times ** widen_exponent more as the node gets
+    visits, so the moves the network gives almost no probability are only
+    tried once a node has been searched a lot. The children are only
+    opened as the width reaches them, so the others take no slot in the
+    tree and are not counted in num_nodes. This needs the node backend,
+    the array backend keeps the children of a node next to each other
+    and can not add children to a node later. None (default) considers
+    all children.
     """
 
     def __init__(self, policy_value_fn, weight_c=5, compute_budget=10000,
-                 expand_bound=10, silent=False):
-        self.root = MCTSTreeNode(None, 1.0)
+                 expand_bound=10, silent=False, tree_backend="node",
+                 batch_size=1, policy_value_batch_fn=None, transposition_size=0,
+                 early_stop=False, max_nodes=None, max_bytes=None, count_reused=False,
+                 top_k=None, widen_rate=1.0, widen_exponent=0.5, collect_stats=False,
+                 stats_callback=None, solver=False):
+        if batch_size > 1 and policy_value_batch_fn is None:
+            raise ValueError("A policy_value_batch_fn is needed for batch_size > 1.")
+        if batch_size > 1 and transposition_size:
+            raise ValueError("Transposition tables can not be used with batch_size > 1.")
+        if top_k is not None and tree_backend == "array":
+            raise ValueError("Progressive widening needs the node tree backend.")
+        self._tree = _makeTree(tree_backend, transposition_size)
+        self._early_stop = early_stop
+        self._node_limit = _nodeLimit(self._tree, max_nodes, max_bytes)
+        self._num_pruned_nodes = 0
+        self._count_reused = count_reused
+        self._collect_stats = collect_stats or stats_callback is not None
+        self._stats_callback = stats_callback
+        self._solver = solver
+        self._top_k = None if top_k is None else max(int(top_k), 1)
+        self._widen_rate = widen_rate
+        self._widen_exponent = widen_exponent
         self._policy_value_fn = policy_value_fn
+        self._policy_value_batch_fn = policy_value_batch_fn
+        self._batch_size = max(int(batch_size), 1)
         self._weight_c = weight_c
         self._compute_budget = int(compute_budget)
         self._silent = silent
@@ -411,32 +1612,168 @@ class MCTSWithDNN(TreeSearch):
     def _playout(self, state):
         """Run a single playout from the root to the leaf, getting a value at
         the leaf and propagating it back throuht the path from the leaf to the root.
-        State is modified in-place, so a copy must be provided.
+        Moves are played on state in-place and taken back before returning,
+        so no copy of state is needed.
+        """
+        num_moves = len(state.moved)
+        try:
+            self._search(state)
+        finally:
+            rewind(state, num_moves)
+
+    def _search(self, state):
+        """The body of _playout. Leaves the moves it played on state.
         """
-        node = self.root
+        tree = self._tree
+        stats = self._stats
+        if stats is not None:
+            tick = time.time()
+        node = tree.root
+        depth = 0
         while True:
-            if node.is_leaf():  # if leaf or only root
+            if tree.isLeaf(node):  # if leaf or only root
                 break
-            action, node = node.select(self._weight_c)
+            action, node = tree.select(node, self._weight_c, self._width(node))
             state.play(action)
+            node = tree.transpose(node, state)
+            depth += 1
+            if self._solver and tree.proven(node):
+                break
+        if stats is not None:
+            stats.addPlayout(depth)
+            tick = stats.lap("select", tick)
+        if self._solver and tree.proven(node):
+            # the outcome is known, no need to evaluate the leaf
+            tree.backPropagation(node, tree.proven(node))
+            return
 
         # Here DNN out value will replace rollout value
-        policy, value = self._policy_value_fn(state)
+        evaluation = tree.cachedEvaluation(node)
+        if evaluation is None:
+            policy, value = self._policy_value_fn(state)
+            evaluation = (list(policy), value)
+            tree.cacheEvaluation(node, evaluation)
+        policy, value = evaluation
+        if stats is not None:
+            tick = stats.lap("evaluate", tick)
         # Check for end of game
         is_end, winner = state.gameEnd()
         if not is_end: 
-            if node.vis_times >= self._expand_bound:
-                node.expand(policy)
+            if tree.visTimes(node) >= self._expand_bound:
+                self._expand(node, policy)
         else:
             if winner is None:
                 value = 0.0
             else:
                 value = 1.0 if state.current_player == winner else -1.0
+                if self._solver:
+                    tree.prove(node, 1)
+        if stats is not None:
+            tick = stats.lap("expand", tick)
 
         # back propagation
-        node.backPropagation(-value)
+        tree.backPropagation(node, -value)
+        if stats is not None:
+            stats.lap("backpropagation", tick)
+
+    def _playoutBatch(self, state, batch_size):
+        """Run batch_size playouts, evaluating all their leaves with a
+        single call of the policy-value batch function.
+
+        The leaves are selected one after another, each with a virtual
+        loss on its path until the batch is evaluated, so they tend to be
+        different leaves. Leaves at the end of the game are backed up at
+        once and are not sent to the network.
+        """
+        tree = self._tree
+        stats = self._stats
+        if stats is not None:
+            tick = time.time()
+        leaves, states, move_lists = [], [], []
+        policies, values = [], []
+        renormalize = bool(state.candidate_radius)
+        try:
+            for _ in range(batch_size):
+                num_moves = len(state.moved)
+                try:
+                    node = tree.root
+                    while not tree.isLeaf(node):
+                        action, node = tree.select(node, self._weight_c, self._width(node))
+                        state.play(action)
+                        if self._solver and tree.proven(node):
+                            break
+                    if stats is not None:
+                        stats.addPlayout(len(state.moved) - num_moves)
+                    if self._solver and tree.proven(node):
+                        tree.backPropagation(node, tree.proven(node))
+                        continue
+
+                    is_end, winner = state.gameEnd()
+                    if is_end:
+                        if winner is None:
+                            value = 0.0
+                        else:
+                            value = 1.0 if state.current_player == winner else -1.0
+                            if self._solver:
+                                tree.prove(node, 1)
+                        tree.backPropagation(node, -value)
+                        continue
+                    tree.addVirtualLoss(node, 1)
+                    leaves.append(node)
+                    states.append(state.currentState(np.float32))
+                    if renormalize:
+                        move_lists.append(state.candidates)
+                    else:
+                        move_lists.append(np.flatnonzero(state.legal_mask).tolist())
+                finally:
+                    rewind(state, num_moves)
+
+            if stats is not None:
+                tick = stats.lap("select", tick)
+            if leaves:
+                policies, values = self._policy_value_batch_fn(
+                    np.stack(states), move_lists, renormalize)
+            if stats is not None:
+                tick = stats.lap("evaluate", tick)
+        finally:
+            for node in leaves:
+                tree.addVirtualLoss(node, -1)
+
+        for node, policy, value in zip(leaves, policies, values):
+            if tree.visTimes(node) >= self._expand_bound:
+                self._expand(node, policy)
+            if stats is not None:
+                tick = stats.lap("expand", tick)
+            tree.backPropagation(node, -value)
+            if stats is not None:
+                tick = stats.lap("backpropagation", tick)
+
+    def _runPlayouts(self, state, num_playouts, progress_bar=None, deadline=None):
+        """Run up to num_playouts playouts, in batches of batch_size. See
+        _stopSearch for when the search stops earlier. Return the number of
+        playouts run.
+        """
+        start = time.time()
+        num_done = 0
+        while num_done < num_playouts:
+            if progress_bar is not None:
+                progress_bar.iterStart()
+            batch_size = min(self._batch_size, num_playouts - num_done)
+            if batch_size == 1:
+                self._playout(state)
+            else:
+                self._playoutBatch(state, batch_size)
+            self._limitTree()
+            num_done += batch_size
+            if progress_bar is not None:
+                progress_bar.iterEnd()
+            check_lead = (num_done // self.kStopCheckInterval !=
+                          (num_done - batch_size) // self.kStopCheckInterval)
+            if self._stopSearch(num_done, num_playouts - num_done, start, deadline, check_lead):
+                break
+        return num_done
 
-    def getMove(self, state, exploration_level):
+    def getMove(self, state, exploration_level, time_limit=None):
         """Run all playouts sequentially and return the available actions and
         their corresponding probabilities.
 
@@ -444,28 +1781,35 @@ class MCTSWithDNN(TreeSearch):
             state: Current board state.
             exploration_level: temperature parameter in (0, 1] controls 
                 the level of exploration.
+            time_limit: If not None, stop the search after time_limit
+                milliseconds even if the compute budget is not used up.
 
         Return:
             All vaild actions with their probabilties.
         """
-        if self._silent:
-            for _ in range(self._compute_budget):
-                state_copy = copy.deepcopy(state)
-                self._playout(state_copy)
-        else:
-            print("Thinking...")
-            pb = ProgressBar(self._compute_budget)
-            for _ in range(self._compute_budget):
-                pb.iterStart()
-                state_copy = copy.deepcopy(state)
-                self._playout(state_copy)
-                pb.iterEnd()
+        # a win proven by the earlier searches needs no search
+        move = self._provenMove()
+        if move is None:
+            num_playouts = self._numPlayouts()
+            self._startStats()
+            if self._silent:
+                self._runPlayouts(state, num_playouts, deadline=_deadline(time_limit))
+            else:
+                print("Thinking...")
+                num_batches = -(-num_playouts // self._batch_size)
+                num_done = self._runPlayouts(state, num_playouts, ProgressBar(num_batches),
+                                             _deadline(time_limit))
+                if num_done < num_playouts:
+                    print("\nStopped after {} playouts.".format(num_done))
+            self._finishStats()
+            move = self._provenMove()
 
         # calculate the move probabilities based on visit
         # counts at the root node
-        act_vis = [(act, node.vis_times)
-                   for act, node in self.root.children.items()]
-        acts, visits = zip(*act_vis)
+        acts, visits = zip(*self._tree.rootChildren())
+        if move is not None:
+            # play the proven win for sure
+            return acts, np.array([float(act == move) for act in acts])
 
         # Softmax version
         # Can use temperature param to do some smooth
@@ -488,30 +1832,35 @@ class MCTSWithDNN(TreeSearch):
             decay_level: A value describe the importence of this think action. 
                 A higher value means MCTS will pay less attention to this 'think action'.
         """
-        for _ in range(self._compute_budget // decay_level):
-            state_copy = copy.deepcopy(state)
-            self._playout(state_copy)
-        act_vis = [(act, node.vis_times)
-                   for act, node in self.root.children.items()]
-        act, visits = zip(*act_vis)
+        self._runPlayouts(state, self._compute_budget // decay_level)
+        act, visits = zip(*self._tree.rootChildren())
         probs = action_prob_via_vis_times(visits)
         return act, probs
 
 
     def updateWithMove(self, last_move):
-        """Reuse the Tree, and take a step forward.
+        """Reuse the Tree, and take a step forward. Stops pondering first.
         """
-        if last_move in self.root.children:
-            self.root = self.root.children[last_move]
-            self.root.parent = None
-        else:
-            self.root = MCTSTreeNode(None, 1.0)
+        self.stopPondering()
+        self._tree.updateWithMove(last_move)
     
     def reset(self):
-        self.root = MCTSTreeNode(None, 1.0)
+        self.stopPondering()
+        self._tree.reset()
+
+    @property
+    def root(self):
+        return self._tree.root
+
+    @property
+    def transposition_table(self):
+        """The TranspositionTable of the tree, or None.
+        """
+        return getattr(self._tree, "table", None)
 
     def __str__(self):
-        return "MCTS(DNN version) with compute budget {} and weight c {}".format(self._compute_budget, self._weight_c)
+        return "MCTS(DNN version) with compute budget {}, weight c {} and batch size {}".format(
+            self._compute_budget, self._weight_c, self._batch_size)
     
     @property
     def silent(self):
@@ -520,5 +1869,29 @@ class MCTSWithDNN(TreeSearch):
     def silent(self, given_value):
         if isinstance(given_value, bool):
             self._silent = given_value
+
+    @property
+    def early_stop(self):
+        return self._early_stop
+    @early_stop.setter
+    def early_stop(self, given_value):
+        if isinstance(given_value, bool):
+            self._early_stop = given_value
+
+    @property
+    def solver(self):
+        return self._solver
+    @solver.setter
+    def solver(self, given_value):
+        if isinstance(given_value, bool):
+            self._solver = given_value
+
+    @property
+    def count_reused(self):
+        return self._count_reused
+    @count_reused.setter
+    def count_reused(self, given_value):
+        if isinstance(given_value, bool):
+            self._count_reused = given_value
             
     __repr__ = __str__
@@ -167,15 +167,45 @@ class SimpleCNN(NeuralNetwork):
         """The Policy-value function.
 
         This function takes a board state and return evaluation value 
-        and next_action probability vector.
+        and next_action probability vector. If the board keeps candidate
+        moves (see Board candidateRadius), only the candidates are returned.
         """
-        valid_positions = board.availables
-        current_state = np.ascontiguousarray(board.currentState().reshape(
+        current_state = np.ascontiguousarray(board.currentState(np.float32).reshape(
             -1, 4, self.board_height, self.board_width))
         policy_vec, value = self.getPolicyValue(current_state)
         # 0 because getPolicyValue takes batch of data
-        policy_vec = zip(valid_positions, policy_vec[0][valid_positions])
-        return policy_vec, value
+        if board.candidate_radius:
+            # only expand the candidates, with priors renormalized over them
+            moves = board.candidates
+            probs = policy_vec[0][moves]
+            probs /= np.sum(probs)
+        else:
+            legal_mask = board.legal_mask
+            moves = np.flatnonzero(legal_mask).tolist()
+            probs = policy_vec[0][legal_mask]
+        return zip(moves, probs), value[0][0]
+
+    def policyValueBatchFunc(self, state_batch, move_lists, renormalize=False):
+        """The policy-value function for a batch of states, with one
+        session run for the whole batch.
+
+        Args:
+            state_batch: A numpy array of board states with shape N * 4 * height * width.
+            move_lists: The moves to return priors for, one list per state.
+            renormalize: If True, rescale the priors of every state to sum to 1
+                over its moves, as policyValueFunc does for candidate moves.
+
+        Return:
+            A list of N (action, probability) lists and an array of N values.
+        """
+        policy_vecs, values = self.getPolicyValue(np.ascontiguousarray(state_batch, dtype=np.float32))
+        action_priors = []
+        for policy_vec, moves in zip(policy_vecs, move_lists):
+            probs = policy_vec[moves]
+            if renormalize:
+                probs /= np.sum(probs)
+            action_priors.append(list(zip(moves, probs)))
+        return action_priors, values[:, 0]
 
     def trainStep(self, state_batch, mcts_probs_batch, winner_batch, lr):
         """Perform single training step.
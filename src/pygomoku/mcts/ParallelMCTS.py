@@ -0,0 +1,361 @@
+# coding=utf-8
+"""Parallel versions of the Monte Carlo Tree Search.
+"""
+from __future__ import print_function
+import copy
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+from pygomoku.mcts.MCTS import MCTS, MCTSWithDNN, TreeSearch, rewind, _deadline
+
+
+def _rootWorker(connection, seed, expand_policy, rollout_policy, kwargs):
+    """Main loop of a RootParallelMCTS worker process.
+
+    Commands are (name, argument) tuples:
+        ("search", (state, num_playouts, deadline)): run the playouts, up
+            to the deadline if not None, and send back the (action,
+            vis_times) list of the root and the node counts.
+        ("update", move): take a step forward in the tree and send back
+            the node counts.
+        ("reset", None): clear the tree and send back the node counts.
+        ("close", None): quit.
+
+    The node counts are the (num_nodes, num_pruned_nodes) of the tree.
+    """
+    np.random.seed(seed)
+    search_tree = MCTS(expand_policy, rollout_policy, silent=True, **kwargs)
+    while True:
+        command, argument = connection.recv()
+        if command == "search":
+            state, num_playouts, deadline = argument
+            search_tree._runPlayouts(state, num_playouts, deadline=deadline)
+            connection.send((search_tree._tree.rootChildren(),
+                             (search_tree.num_nodes, search_tree.num_pruned_nodes)))
+        elif command == "update":
+            search_tree.updateWithMove(argument)
+            connection.send((search_tree.num_nodes, search_tree.num_pruned_nodes))
+        elif command == "reset":
+            search_tree.reset()
+            connection.send((search_tree.num_nodes, search_tree.num_pruned_nodes))
+        elif command == "close":
+            break
+    connection.close()
+
+
+class RootParallelMCTS(TreeSearch):
+    """Root parallel Monte Carlo Tree Search over worker processes.
+
+    Every worker keeps its own MCTS tree of the same position, searched
+    with its own random seed, and the move is chosen by the visit times
+    of the root children summed over all workers. The workers are
+    started at the first search and live until close, so every worker
+    keeps reusing its tree through updateWithMove.
+
+    Attributes:
+        _num_workers: The number of worker processes.
+        _compute_budget: The number of playouts of every worker per move,
+            so a move takes about as long as with a single MCTS when there
+            are enough cores.
+        _seed: The seed of worker i is seed + i.
+        _node_counts: The last (num_nodes, num_pruned_nodes) sent by
+            every worker.
+
+    max_nodes and max_bytes limit the tree of every worker, see MCTS,
+    and num_nodes and num_pruned_nodes are summed over the workers.
+    The search collects no SearchStats, stats is always None, and the
+    playouts kept from earlier searches are never counted toward
+    compute_budget.
+    """
+
+    def __init__(self, expand_policy, rollout_policy, weight_c=5, compute_budget=10000,
+                 expand_bound=1, silent=False, tree_backend="node", num_workers=2, seed=None,
+                 num_rollouts=1, fast_rollout=False, max_nodes=None, max_bytes=None):
+        self._expand_policy = expand_policy
+        self._rollout_policy = rollout_policy
+        self._tree_kwargs = dict(weight_c=weight_c, compute_budget=compute_budget,
+                                 expand_bound=expand_bound, tree_backend=tree_backend,
+                                 num_rollouts=num_rollouts, fast_rollout=fast_rollout,
+                                 max_nodes=max_nodes, max_bytes=max_bytes)
+        self._weight_c = weight_c
+        self._compute_budget = int(compute_budget)
+        self._silent = silent
+        self._num_workers = int(num_workers)
+        self._seed = np.random.randint(2**31 - num_workers) if seed is None else seed
+        self._workers = []
+        self._node_counts = []
+
+    def _startWorkers(self):
+        for i in range(self._num_workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_rootWorker,
+                args=(worker_connection, self._seed + i, self._expand_policy,
+                      self._rollout_policy, self._tree_kwargs))
+            process.daemon = True
+            process.start()
+            worker_connection.close()
+            self._workers.append((process, connection))
+
+    def _broadcast(self, command, argument=None):
+        for _, connection in self._workers:
+            connection.send((command, argument))
+
+    def _receiveNodeCounts(self):
+        self._node_counts = [connection.recv() for _, connection in self._workers]
+
+    def _playout(self, state):
+        """Run one playout in every worker.
+        """
+        self._search(state, 1)
+
+    def _search(self, state, num_playouts, deadline=None):
+        """Run num_playouts playouts in every worker, stopping at the deadline
+        (a time.time()) if not None, and return the summed visit times of
+        the root children, as an {action: vis_times} dict.
+        """
+        if not self._workers:
+            self._startWorkers()
+        self._broadcast("search", (state, num_playouts, deadline))
+        visits = {}
+        node_counts = []
+        for _, connection in self._workers:
+            root_children, counts = connection.recv()
+            for action, vis_times in root_children:
+                visits[action] = visits.get(action, 0) + vis_times
+            node_counts.append(counts)
+        self._node_counts = node_counts
+        return visits
+
+    def _numPlayouts(self):
+        """The number of playouts of every worker for getMove.
+        """
+        return self._compute_budget
+
+    def _runPlayouts(self, state, num_playouts, progress_bar=None, deadline=None):
+        """Run num_playouts playouts in every worker, see _search. Return
+        num_playouts.
+        """
+        self._search(state, num_playouts, deadline)
+        return num_playouts
+
+    def getMove(self, state, time_limit=None):
+        """Runs the playouts in all workers and returns the most visited
+        action over all workers. time_limit is in milliseconds, see MCTS.getMove.
+        """
+        # if at the beginning of game, we should put stone at center.
+        if state.is_empty:
+            return len(state.availables) // 2
+        if not self._silent:
+            print("Thinking...")
+        visits = self._search(state, self._numPlayouts(), _deadline(time_limit))
+        return max(visits.items(), key=lambda act_vis: act_vis[1])[0]
+
+    def think(self, state, decay_level=100):
+        """Similar to getMove but with less compute budget, see MCTS.think.
+        """
+        visits = self._search(state, max(self._compute_budget // decay_level, 1))
+        return max(visits.items(), key=lambda act_vis: act_vis[1])[0]
+
+    def updateWithMove(self, last_move):
+        """Take a step forward in the tree of every worker. Stops pondering first.
+        """
+        self.stopPondering()
+        self._broadcast("update", last_move)
+        self._receiveNodeCounts()
+
+    def reset(self):
+        self.stopPondering()
+        self._broadcast("reset")
+        self._receiveNodeCounts()
+
+    def close(self):
+        """Stop the worker processes. They are started again by the next search.
+        """
+        self.stopPondering()
+        self._broadcast("close")
+        for process, connection in self._workers:
+            process.join()
+            connection.close()
+        self._workers = []
+        self._node_counts = []
+
+    def __str__(self):
+        return "Root parallel MCTS with {} workers, compute budget {} per worker and weight c {}".format(
+            self._num_workers, self._compute_budget, self._weight_c)
+
+    @property
+    def silent(self):
+        return self._silent
+    @silent.setter
+    def silent(self, given_value):
+        if isinstance(given_value, bool):
+            self._silent = given_value
+
+    @property
+    def num_workers(self):
+        return self._num_workers
+
+    @property
+    def num_nodes(self):
+        """The nodes of all worker trees, 0 before the workers are started.
+        """
+        return sum(num_nodes for num_nodes, _ in self._node_counts)
+
+    @property
+    def num_pruned_nodes(self):
+        return sum(num_pruned_nodes for _, num_pruned_nodes in self._node_counts)
+
+    __repr__ = __str__
+
+
+class TreeParallelMCTS(MCTSWithDNN):
+    """Tree parallel MCTS with a neural network: num_threads threads run
+    playouts on one shared tree.
+
+    Every thread plays on its own copy of the board. Selection, expansion
+    and backpropagation hold the tree lock, while the policy-value
+    function runs without it, so the threads overlap their network calls
+    (tensorflow releases the GIL in session.run). A thread puts a virtual
+    loss on its path until its leaf is evaluated, which keeps the other
+    threads off that path.
+
+    The tree updates are short compared to a network call, so a single
+    lock for the whole tree costs little, and under the GIL finer locks
+    would not let tree updates run in parallel anyway.
+
+    The tree can not be pruned while other threads have playouts on it,
+    so with a node limit (see max_nodes of MCTS) the threads stop
+    expanding leaves when the tree is full, and the tree is pruned after
+    the search.
+
+    Attributes:
+        _num_threads: The number of search threads.
+        _lock: The lock guarding the tree.
+    """
+
+    def __init__(self, policy_value_fn, weight_c=5, compute_budget=10000,
+                 expand_bound=10, silent=False, tree_backend="node", num_threads=4,
+                 early_stop=False, max_nodes=None, max_bytes=None, count_reused=False,
+                 top_k=None, widen_rate=1.0, widen_exponent=0.5, collect_stats=False,
+                 stats_callback=None, solver=False):
+        super(TreeParallelMCTS, self).__init__(
+            policy_value_fn, weight_c=weight_c, compute_budget=compute_budget,
+            expand_bound=expand_bound, silent=silent, tree_backend=tree_backend,
+            early_stop=early_stop, max_nodes=max_nodes, max_bytes=max_bytes,
+            count_reused=count_reused, top_k=top_k, widen_rate=widen_rate,
+            widen_exponent=widen_exponent, collect_stats=collect_stats,
+            stats_callback=stats_callback, solver=solver)
+        self._num_threads = max(int(num_threads), 1)
+        self._lock = threading.Lock()
+
+    def _threadPlayout(self, state):
+        """Run a single playout on the shared tree, state is the board of
+        the calling thread.
+        """
+        tree = self._tree
+        stats = self._stats
+        if stats is not None:
+            tick = time.time()
+        num_moves = len(state.moved)
+        try:
+            with self._lock:
+                node = tree.root
+                while not tree.isLeaf(node):
+                    action, node = tree.select(node, self._weight_c, self._width(node))
+                    state.play(action)
+                    if self._solver and tree.proven(node):
+                        break
+                if stats is not None:
+                    stats.addPlayout(len(state.moved) - num_moves)
+                    tick = stats.lap("select", tick)
+                if self._solver and tree.proven(node):
+                    tree.backPropagation(node, tree.proven(node))
+                    return
+                is_end, winner = state.gameEnd()
+                if is_end:
+                    if winner is None:
+                        value = 0.0
+                    else:
+                        value = 1.0 if state.current_player == winner else -1.0
+                        if self._solver:
+                            tree.prove(node, 1)
+                    tree.backPropagation(node, -value)
+                    return
+                tree.addVirtualLoss(node, 1)
+
+            try:
+                policy, value = self._policy_value_fn(state)
+                policy = list(policy)
+            finally:
+                with self._lock:
+                    tree.addVirtualLoss(node, -1)
+                    if stats is not None:
+                        tick = stats.lap("evaluate", tick)
+
+            with self._lock:
+                if (tree.visTimes(node) >= self._expand_bound and
+                        (self._node_limit is None or tree.num_nodes < self._node_limit)):
+                    self._expand(node, policy)
+                if stats is not None:
+                    tick = stats.lap("expand", tick)
+                tree.backPropagation(node, -value)
+                if stats is not None:
+                    stats.lap("backpropagation", tick)
+        finally:
+            rewind(state, num_moves)
+
+    def _runPlayouts(self, state, num_playouts, progress_bar=None, deadline=None):
+        """Run up to num_playouts playouts over num_threads threads and
+        return the number of playouts started. progress_bar is only used
+        with a single thread.
+        """
+        if self._num_threads == 1 or num_playouts <= 1:
+            return super(TreeParallelMCTS, self)._runPlayouts(state, num_playouts, progress_bar, deadline)
+
+        start = time.time()
+        remaining = [num_playouts]
+        stopped = [False]
+        errors = []
+
+        def work(board):
+            try:
+                while True:
+                    with self._lock:
+                        if not remaining[0] or errors or stopped[0]:
+                            return
+                        num_done = num_playouts - remaining[0]
+                        # the playouts of the other threads are still running
+                        if num_done and self._stopSearch(
+                                num_done, remaining[0] + self._num_threads, start, deadline,
+                                num_done % self.kStopCheckInterval == 0):
+                            stopped[0] = True
+                            return
+                        remaining[0] -= 1
+                    self._threadPlayout(board)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(copy.deepcopy(state),))
+                   for _ in range(min(self._num_threads, num_playouts))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+        self._limitTree()
+        return num_playouts - remaining[0]
+
+    def __str__(self):
+        return "Tree parallel MCTS(DNN version) with {} threads, compute budget {} and weight c {}".format(
+            self._num_threads, self._compute_budget, self._weight_c)
+
+    @property
+    def num_threads(self):
+        return self._num_threads
+
+    __repr__ = __str__
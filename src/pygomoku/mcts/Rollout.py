@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Random rollouts played with numpy instead of move by move on a Board.
+"""
+import numpy as np
+
+
+def _firstLineTimes(times, number_to_win):
+    """Find when the first line of number_to_win stones is completed.
+
+    Args:
+        times: A float array with shape (R, height, width), the time every
+            cell gets a stone of the player, inf if it never does.
+        number_to_win: How many stones need on a line to win.
+
+    Return:
+        A float array with shape (R,), the time of the first line, inf if
+        there is none.
+    """
+    n = number_to_win
+    _, height, width = times.shape
+    first = np.full(times.shape[0], np.inf)
+    # cell k of a window, one slice per direction as in BatchBoard._hasLine,
+    # a window is completed when its last cell is filled
+    directions = [
+        lambda k: times[:, :, k:width - n + 1 + k],
+        lambda k: times[:, k:height - n + 1 + k, :],
+        lambda k: times[:, k:height - n + 1 + k, k:width - n + 1 + k],
+        lambda k: times[:, k:height - n + 1 + k, n - 1 - k:width - k],
+    ]
+    for window in directions:
+        line = window(0).copy()
+        if line.size == 0:
+            continue
+        for k in range(1, n):
+            np.maximum(line, window(k), out=line)
+        np.minimum(first, line.reshape(line.shape[0], -1).min(axis=1), out=first)
+    return first
+
+
+def batchRollout(state, num_rollouts):
+    """Play num_rollouts uniformly random games from state at once and
+    return their outcomes from the perspective of the current player of
+    state: +1 for a win, -1 for a loss and 0 for a tie.
+
+    A random game plays the empty positions in a random order, so every
+    rollout is a random permutation of the empty positions, the current
+    player taking the even places. Instead of playing it, every position
+    gets the time its stone is played, and a rollout is won by the player
+    who completes a line first: the line completed at the smallest time,
+    with the time of a line being the latest time of its stones. The
+    stones already on board have time -1. This gives the same results as
+    playing the games move by move with a uniform rollout policy.
+
+    Args:
+        state: The board, it is not changed.
+        num_rollouts: The number of random games R.
+
+    Return:
+        A float array with shape (R,).
+    """
+    is_end, winner = state.gameEnd()
+    if is_end:
+        if winner is None:
+            return np.zeros(num_rollouts)
+        return np.full(num_rollouts, 1.0 if winner == state.current_player else -1.0)
+
+    planes = state.currentState(np.int8)
+    empty = np.flatnonzero(state.legal_mask)
+    order = np.argsort(np.random.rand(num_rollouts, len(empty)), axis=1)
+    own_times = np.full((num_rollouts, state.height * state.width), np.inf)
+    other_times = np.full((num_rollouts, state.height * state.width), np.inf)
+    own_times[:, planes[0].ravel() != 0] = -1
+    other_times[:, planes[1].ravel() != 0] = -1
+    own_turn = order % 2 == 0
+    own_times[:, empty] = np.where(own_turn, order, np.inf)
+    other_times[:, empty] = np.where(own_turn, np.inf, order)
+
+    shape = (num_rollouts, state.height, state.width)
+    own_first = _firstLineTimes(own_times.reshape(shape), state.numberToWin)
+    other_first = _firstLineTimes(other_times.reshape(shape), state.numberToWin)
+    # both are inf for a tie, otherwise they differ
+    return (own_first < other_first).astype(np.float64) - (other_first < own_first)
+
+
+def shuffledRollout(state):
+    """Play one uniformly random game from state, in place, and return its
+    outcome from the perspective of the current player of state.
+
+    The empty positions are shuffled once and played in that order, and
+    only the last move is checked for a win (Board.fastGetWinner), so
+    no policy is evaluated on the way. The moves stay on state, take
+    them back with MCTS.rewind.
+    """
+    player_color = state.current_player
+    is_end, winner = state.gameEnd()
+    if not is_end:
+        moves = list(state.availables)
+        np.random.shuffle(moves)
+        for move in moves:
+            state.play(move)
+            winner = state.fastGetWinner()
+            if winner is not None:
+                break
+    if winner is None:
+        return 0
+    return 1 if winner == player_color else -1
@@ -0,0 +1,85 @@
+# coding=utf-8
+"""Statistics collected by a tree search, see collect_stats of MCTS.
+"""
+import time
+
+
+class SearchStats(object):
+    """The statistics of one search (one getMove): playouts, depth, tree
+    size and the time spent in every phase of the playouts.
+
+    The phases are select (walking down the tree), evaluate (the expand
+    policy or the policy-value network at the leaf), expand, rollout
+    (pure MCTS only) and backpropagation. The phase times are measured
+    with time.time around every phase, in seconds. With several search
+    threads they are summed over the threads, so they can add up to more
+    than elapsed.
+
+    Attributes:
+        num_playouts: The number of playouts run.
+        max_depth: The most moves a playout selected in the tree.
+        depth_sum: The sum of the depths of all playouts.
+        phase_times: A dict from phase name to the seconds spent in it.
+        num_nodes: The number of nodes of the tree at the end of the search.
+        nodes_created: The nodes added to the tree during the search,
+            including the ones pruned since.
+        elapsed: The seconds the search took.
+    """
+    kPhases = ("select", "evaluate", "expand", "rollout", "backpropagation")
+
+    def __init__(self, num_nodes=0, num_pruned_nodes=0):
+        self.num_playouts = 0
+        self.max_depth = 0
+        self.depth_sum = 0
+        self.phase_times = dict.fromkeys(SearchStats.kPhases, 0.0)
+        self.num_nodes = num_nodes
+        self.nodes_created = 0
+        self.elapsed = 0.0
+        self.__start = time.time()
+        self.__start_nodes = num_nodes
+        self.__start_pruned = num_pruned_nodes
+
+    def lap(self, phase, tick):
+        """Add the time from tick until now to phase and return now, the
+        tick of the next phase.
+        """
+        now = time.time()
+        self.phase_times[phase] += now - tick
+        return now
+
+    def addPlayout(self, depth):
+        self.num_playouts += 1
+        self.depth_sum += depth
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def finish(self, num_nodes, num_pruned_nodes=0):
+        """End the search, with the node counts of the tree after it.
+        """
+        self.elapsed = time.time() - self.__start
+        self.num_nodes = num_nodes
+        self.nodes_created = (num_nodes - self.__start_nodes +
+                              num_pruned_nodes - self.__start_pruned)
+
+    @property
+    def playouts_per_second(self):
+        return self.num_playouts / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mean_depth(self):
+        return float(self.depth_sum) / self.num_playouts if self.num_playouts else 0.0
+
+    def __str__(self):
+        lines = ["{} playouts in {:.3f} s ({:.0f} playouts/s)".format(
+                     self.num_playouts, self.elapsed, self.playouts_per_second),
+                 "depth: mean {:.2f}, max {}".format(self.mean_depth, self.max_depth),
+                 "nodes: {} ({} created)".format(self.num_nodes, self.nodes_created)]
+        total = sum(self.phase_times.values())
+        for phase in SearchStats.kPhases:
+            seconds = self.phase_times[phase]
+            if seconds > 0:
+                lines.append("{:>16}: {:8.3f} s ({:5.1f}%)".format(
+                    phase, seconds, 100.0 * seconds / total))
+        return "\n".join(lines)
+
+    __repr__ = __str__
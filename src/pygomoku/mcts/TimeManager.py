@@ -0,0 +1,56 @@
+# coding=utf-8
+"""Splitting the clock of a game over the moves of a player.
+"""
+
+
+class TimeManager(object):
+    """Splits a clock of game_time milliseconds per game, plus increment
+    milliseconds after every move, over the moves of a player.
+
+    Every move gets an equal share of the remaining time over the moves
+    expected to be left, which are the empty points left for the player
+    but at most moves_to_go, plus the increment. safety_margin
+    milliseconds are always kept back for the time spent outside the
+    search.
+
+    Usage:
+        time_limit = time_manager.moveTime(board)
+        ... search for at most time_limit milliseconds ...
+        time_manager.update(elapsed_milliseconds)
+    """
+
+    def __init__(self, game_time, increment=0, moves_to_go=20, safety_margin=20):
+        self.__game_time = float(game_time)
+        self.__increment = float(increment)
+        self.__moves_to_go = max(int(moves_to_go), 1)
+        self.__safety_margin = float(safety_margin)
+        self.__remaining = self.__game_time
+
+    def reset(self):
+        """Start the clock of a new game.
+        """
+        self.__remaining = self.__game_time
+
+    def moveTime(self, state):
+        """Return the time in milliseconds to spend on the next move of state.
+        """
+        moves_left = min(max(len(state.availables) // 2, 1), self.__moves_to_go)
+        move_time = self.__remaining / moves_left + self.__increment
+        return max(min(move_time, self.__remaining - self.__safety_margin), 0.0)
+
+    def update(self, elapsed):
+        """Take elapsed milliseconds spent on a move from the clock.
+        """
+        self.__remaining = max(self.__remaining - elapsed, 0.0) + self.__increment
+
+    @property
+    def remaining(self):
+        """The milliseconds left on the clock.
+        """
+        return self.__remaining
+
+    def __str__(self):
+        return "TimeManager({:.0f} ms + {:.0f} ms per move, {:.0f} ms left)".format(
+            self.__game_time, self.__increment, self.__remaining)
+
+    __repr__ = __str__
@@ -28,8 +28,10 @@ def MCTS_expand_policy_fn(board):
 
     This function takes a board state and return the 
     avaliable action combined with its prior probability(all the same)
-    to expand current node in MCT. The function also return the evaluation 
-    value for current board state(which is 0).
+    to expand current node in MCT. If the board keeps candidate moves
+    (see Board candidateRadius), only the candidates are expanded.
+    The function also return the evaluation value for current board
+    state(which is 0).
 
     Args:
         board: current (leaf node if use MCTS) state.
@@ -37,5 +39,9 @@ def MCTS_expand_policy_fn(board):
     Return:
         a list with format [e1,e2,...](e=[action, prob]) and a value.
     """
-    action_probs = np.ones(len(board.availables)) / len(board.availables)
-    return zip(board.availables, action_probs), 0
+    if board.candidate_radius:
+        moves = board.candidates
+    else:
+        moves = np.flatnonzero(board.legal_mask).tolist()
+    action_probs = np.ones(len(moves)) / len(moves)
+    return zip(moves, action_probs), 0
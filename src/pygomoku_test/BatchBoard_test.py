@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+from pygomoku.Board import Board
+from pygomoku.BatchBoard import BatchBoard, labelWinners
+
+
+class TestGomokuBatchBoard(unittest.TestCase):
+    def setUp(self):
+        self.batch_board = BatchBoard(3, width=9, height=9)
+
+    def test_play_and_undo(self):
+        error_report = "Got error in play/undo"
+        played = self.batch_board.play([10, -1, 80])
+        self.assertListEqual(played.tolist(), [True, False, True], error_report)
+        played = self.batch_board.play([10, 11, 81])
+        self.assertListEqual(played.tolist(), [False, True, False], error_report + " -> invalid move")
+        self.assertListEqual(self.batch_board.last_move.tolist(), [10, 11, 80], error_report)
+        self.assertListEqual(self.batch_board.current_player.tolist(),
+                             [Board.kPlayerWhite] * 3, error_report + " -> current player")
+
+        undone = self.batch_board.undo([True, True, False])
+        self.assertListEqual(undone.tolist(), [True, True, False], error_report + " -> undo")
+        self.assertListEqual(self.batch_board.last_move.tolist(), [-1, -1, 80], error_report + " -> undo")
+        self.assertTrue(self.batch_board.legal_mask[:2].all(), error_report + " -> undo")
+
+    def test_gameEnd(self):
+        error_report = "Got error in gameEnd"
+        for i in range(4):
+            self.batch_board.play([i, i * 10, 4 * 9 + i])
+            self.batch_board.play([i + 9, i * 10 + 1, 5 * 9 + i])
+        self.batch_board.play([4, 40, 8])
+        is_end, winner = self.batch_board.gameEnd()
+        self.assertListEqual(is_end.tolist(), [True, True, False], error_report)
+        self.assertListEqual(winner.tolist(), [Board.kPlayerBlack, Board.kPlayerBlack, Board.kEmpty],
+                             error_report)
+
+    def test_random_games(self):
+        error_report = "Got error in random games"
+        np.random.seed(0)
+        boards = [Board(width=9, height=9) for _ in range(len(self.batch_board))]
+        for _ in range(60):
+            moves = np.array([np.random.choice(board.availables) for board in boards])
+            self.batch_board.play(moves)
+            for board, move in zip(boards, moves.tolist()):
+                board.play(move)
+            _, winner = self.batch_board.gameEnd()
+            for board, board_winner in zip(boards, winner.tolist()):
+                expect = board.getWinner()
+                self.assertEqual(Board.kEmpty if expect is None else expect, board_winner, error_report)
+        state = self.batch_board.currentState()
+        for board, board_state in zip(boards, state):
+            self.assertTrue(np.array_equal(board.currentState(), board_state), error_report + " -> currentState")
+
+    def test_board_conversion(self):
+        error_report = "Got error in board conversion"
+        board = Board(width=9, height=9)
+        board.initBoard(Board.kPlayerWhite)
+        for move in [40, 41, 31, 50]:
+            board.play(move)
+        batch_board = BatchBoard.fromBoards([board, Board(width=9, height=9)])
+        self.assertTrue(np.array_equal(batch_board.currentState()[0], board.currentState()), error_report)
+        self.assertListEqual(batch_board.num_moves.tolist(), [4, 0], error_report)
+
+        board_copy = batch_board.toBoard(0)
+        self.assertListEqual(board_copy.moved, board.moved, error_report + " -> toBoard")
+        self.assertEqual(board_copy.current_player, board.current_player, error_report + " -> toBoard")
+        self.assertEqual(board_copy.zobrist_hash, board.zobrist_hash, error_report + " -> toBoard")
+
+    def test_labelWinners(self):
+        error_report = "Got error in labelWinners"
+        np.random.seed(1)
+        for number_to_win in (4, 5):
+            boards, stones, states, expects = [], [], [], []
+            for _ in range(60):
+                board = Board(width=7, height=8, numberToWin=number_to_win)
+                board.initBoard(Board.randomPlayer())
+                # keep playing after the game ended, so both colors can have a line
+                for move in np.random.permutation(56)[:np.random.randint(0, 57)].tolist():
+                    board.play(move)
+                stone = np.full(56, Board.kEmpty, dtype=np.int8)
+                stone[board.moved] = [board.states[move] for move in board.moved]
+                stones.append(stone.reshape(8, 7))
+                states.append(board.currentState())
+                winner = board.getWinner()
+                expects.append(Board.kEmpty if winner is None else winner)
+                boards.append(board)
+
+            is_end, winner = labelWinners(np.array(states), number_to_win)
+            self.assertListEqual(winner.tolist(), expects, error_report + " -> planes")
+            self.assertListEqual(is_end.tolist(),
+                                 [w != Board.kEmpty or not b.availables for w, b in zip(expects, boards)],
+                                 error_report + " -> planes")
+            current_player = np.array([board.current_player for board in boards])
+            _, winner = labelWinners(np.array(stones), number_to_win, current_player)
+            self.assertListEqual(winner.tolist(), expects, error_report + " -> stones")
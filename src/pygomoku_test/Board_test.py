@@ -1,6 +1,11 @@
+import copy
 import unittest
 
+import numpy as np
+
 from pygomoku.Board import Board
+from pygomoku.mcts.policy_fn import MCTS_expand_policy_fn
+from pygomoku.Pattern import Pattern
 
 
 class TestGomokuBoard(unittest.TestCase):
@@ -38,6 +43,12 @@ class TestGomokuBoard(unittest.TestCase):
             17), "Got error in put stone on a stone")
         self.board.undo()
         self.assertEqual(self.board.last_move, None, "Got error in undo")
+        # a move off the board leaves the board untouched
+        for move in (-1, 15 * 15):
+            self.assertRaises(ValueError, self.board.play, move)
+        self.assertDictEqual(self.board.states, {}, "Got error in play off the board")
+        self.assertEqual(len(self.board.availables), 15 * 15, "Got error in play off the board")
+        self.assertTrue(self.board.legal_mask.all(), "Got error in play off the board")
 
     def test_gameEnd(self):
         for i in range(4):
@@ -61,3 +72,162 @@ class TestGomokuBoard(unittest.TestCase):
         self.board.play(4)
         dubug_result = self.board.gameEnd()
         self.assertEqual(list(self.board.gameEnd()), [False, None], "Got error in gameEnd")
+
+    def test_currentState(self):
+        error_report = "Got error in currentState"
+        self.board.play(17)
+        self.board.play(18)
+        self.board.play(40)
+        state = self.board.currentState()
+        self.assertEqual(state.shape, (4, 15, 15), error_report)
+        self.assertEqual(state.dtype, np.float64, error_report)
+        self.assertEqual(state[0].sum(), 1, error_report + " -> current player")
+        self.assertEqual(state[0][1, 3], 1, error_report + " -> current player")
+        self.assertEqual(state[1].sum(), 2, error_report + " -> opponent")
+        self.assertEqual(state[2][2, 10], 1, error_report + " -> last move")
+        self.assertEqual(state[2].sum(), 1, error_report + " -> last move")
+        self.assertEqual(state[3].sum(), 0, error_report + " -> player to play")
+
+        self.board.undo()
+        state = self.board.currentState(np.uint8)
+        self.assertEqual(state.dtype, np.uint8, error_report + " -> dtype")
+        self.assertEqual(state[0][1, 2], 1, error_report + " -> undo")
+        self.assertEqual(state[1][1, 3], 1, error_report + " -> undo")
+        self.assertEqual(state[2][1, 3], 1, error_report + " -> undo")
+        self.assertEqual(state[3].sum(), 15 * 15, error_report + " -> undo")
+
+    def test_availables_and_legal_mask(self):
+        error_report = "Got error in availables"
+        before = list(self.board.availables)
+        self.board.play(17)
+        self.board.play(0)
+        self.assertFalse(self.board.isValidMove(17), error_report + " -> isValidMove")
+        self.assertTrue(self.board.isValidMove(18), error_report + " -> isValidMove")
+        self.assertEqual(len(self.board.availables), 15 * 15 - 2, error_report)
+        self.assertNotIn(17, self.board.availables, error_report)
+        self.assertListEqual(np.flatnonzero(self.board.legal_mask).tolist(),
+                             sorted(self.board.availables), error_report + " -> legal_mask")
+        self.board.undo()
+        self.board.undo()
+        self.assertListEqual(self.board.availables, before, error_report + " -> undo")
+        self.assertTrue(self.board.legal_mask.all(), error_report + " -> legal_mask")
+
+    def test_zobrist_hash(self):
+        error_report = "Got error in zobrist_hash"
+        empty_hash = self.board.zobrist_hash
+        self.board.play(17)
+        self.board.play(18)
+        self.board.play(40)
+        self.assertTrue(0 <= self.board.zobrist_hash < 2**64, error_report)
+
+        other = Board()
+        other.play(40)
+        other.play(18)
+        other.play(17)
+        self.assertEqual(self.board.zobrist_hash, other.zobrist_hash,
+                         error_report + " -> transposition")
+        other.undo()
+        self.assertNotEqual(self.board.zobrist_hash, other.zobrist_hash,
+                            error_report + " -> side to move")
+
+        for _ in range(3):
+            self.board.undo()
+        self.assertEqual(self.board.zobrist_hash, empty_hash, error_report + " -> undo")
+        self.board.initBoard(Board.kPlayerWhite)
+        self.assertNotEqual(self.board.zobrist_hash, empty_hash, error_report + " -> initBoard")
+        self.assertNotEqual(Board(zobristSeed=1).zobrist_hash, empty_hash,
+                            error_report + " -> seed")
+
+    def test_deepcopy(self):
+        error_report = "Got error in deepcopy"
+        self.board.play(17)
+        board_copy = copy.deepcopy(self.board)
+        board_copy.play(18)
+        self.assertTrue(self.board.legal_mask[18], error_report + " -> original changed")
+        self.assertFalse(board_copy.legal_mask[18], error_report + " -> legal_mask")
+        self.assertEqual(board_copy.currentState()[1][1, 3], 1, error_report + " -> currentState")
+        self.assertEqual(self.board.currentState()[:2].sum(), 1, error_report + " -> original changed")
+
+    def test_fastGetWinner_fuzz(self):
+        error_report = "Got error in fastGetWinner"
+        np.random.seed(0)
+        for width, height, number_to_win in [(15, 15, 5), (9, 7, 5), (8, 6, 4), (3, 3, 3)]:
+            board = Board(width=width, height=height, numberToWin=number_to_win)
+            for _ in range(100):
+                board.initBoard(Board.randomPlayer())
+                while True:
+                    board.play(int(np.random.choice(board.availables)))
+                    self.assertEqual(board.fastGetWinner(), board.getWinner(), error_report)
+                    if np.random.rand() < 0.2:
+                        board.undo()
+                        self.assertEqual(board.fastGetWinner(), board.getWinner(),
+                                         error_report + " -> undo")
+                    if board.gameEnd()[0]:
+                        break
+
+    def test_threats(self):
+        error_report = "Got error in threats"
+        self.assertRaises(RuntimeError, self.board.threats, Board.kPlayerBlack)
+
+        board = Board(trackThreats=True)
+        for move in [112, 0, 113, 2, 114]:
+            board.play(move)
+        threats = board.threats(Board.kPlayerBlack)
+        self.assertEqual(threats[Pattern.kOpenThree], 2, error_report + " -> open three")
+        self.assertEqual(sum(threats), 2, error_report)
+        self.assertEqual(board.threats(Board.kPlayerBlack, 0)[Pattern.kOpenThree], 2,
+                         error_report + " -> direction")
+        self.assertEqual(board.threats(Board.kPlayerBlack, 1)[Pattern.kOpenThree], 0,
+                         error_report + " -> direction")
+
+        board.play(30)
+        board.play(115)
+        threats = board.threats(Board.kPlayerBlack)
+        self.assertEqual(threats[Pattern.kOpenFour], 1, error_report + " -> open four")
+        self.assertEqual(threats[Pattern.kFour], 2, error_report + " -> four")
+        board.play(116)
+        threats = board.threats(Board.kPlayerBlack)
+        self.assertEqual(threats[Pattern.kOpenFour], 0, error_report + " -> blocked four")
+        self.assertEqual(threats[Pattern.kFour], 1, error_report + " -> blocked four")
+
+        for _ in range(3):
+            board.undo()
+        self.assertListEqual(board.threats(Board.kPlayerBlack), [0, 0, 0, 2, 0, 0, 0],
+                             error_report + " -> undo")
+
+    def test_candidates(self):
+        error_report = "Got error in candidates"
+        self.assertListEqual(self.board.candidates, self.board.availables,
+                             error_report + " -> radius off")
+
+        board = Board(candidateRadius=1)
+        self.assertEqual(len(board.candidates), 225, error_report + " -> empty board")
+        board.play(112)
+        self.assertSetEqual(set(board.candidates), {96, 97, 98, 111, 113, 126, 127, 128},
+                            error_report + " -> neighbourhood")
+        board.play(0)
+        self.assertSetEqual(set(board.candidates), {96, 97, 98, 111, 113, 126, 127, 128, 1, 15, 16},
+                            error_report + " -> corner")
+
+        np.random.seed(3)
+        board = Board(width=9, height=9, candidateRadius=2)
+        moves = np.random.permutation(81)[:40].tolist()
+        snapshots = []
+        for move in moves:
+            snapshots.append(list(board.candidates))
+            board.play(move)
+            expected = {m for m in board.availables
+                        if any(abs(m // 9 - s // 9) <= 2 and abs(m % 9 - s % 9) <= 2
+                               for s in board.moved)}
+            self.assertSetEqual(set(board.candidates), expected, error_report)
+        for snapshot in reversed(snapshots):
+            board.undo()
+            self.assertListEqual(board.candidates, snapshot, error_report + " -> undo")
+
+        # the expand priors pair up with the moves of the position they were made for
+        board = Board(candidateRadius=1)
+        board.play(112)
+        action_probs, _ = MCTS_expand_policy_fn(board)
+        candidates = board.candidates
+        board.play(candidates[0])
+        self.assertListEqual([move for move, _ in action_probs], candidates, error_report + " -> copy")
@@ -0,0 +1,410 @@
+import copy
+import time
+import unittest
+
+import numpy as np
+
+from pygomoku.Board import Board
+from pygomoku.mcts.MCTS import MCTS, MCTSWithDNN, TranspositionTable
+from pygomoku.mcts.policy_fn import rollout_policy_fn, MCTS_expand_policy_fn
+
+
+def root_visits(search_tree):
+    return sorted((act, node.vis_times) for act, node in search_tree.root.children.items())
+
+
+class LinearNetwork(object):
+    """A small numpy stand-in for the policy-value network.
+    """
+    def __init__(self, height, width):
+        rng = np.random.RandomState(0)
+        self.weights = rng.randn(4 * height * width, height * width + 1) * 0.1
+        self.num_calls = 0
+
+    def evaluate(self, state_batch):
+        out = state_batch.reshape(state_batch.shape[0], -1).dot(self.weights)
+        policy = np.exp(out[:, :-1])
+        return policy / policy.sum(axis=1, keepdims=True), np.tanh(out[:, -1])
+
+    def policyValueFunc(self, board):
+        self.num_calls += 1
+        policies, values = self.policyValueBatchFunc(
+            board.currentState()[np.newaxis], [np.flatnonzero(board.legal_mask).tolist()])
+        return policies[0], values[0]
+
+    def policyValueBatchFunc(self, state_batch, move_lists, renormalize=False):
+        policy_vecs, values = self.evaluate(state_batch)
+        return [list(zip(moves, policy_vec[moves])) for policy_vec, moves
+                in zip(policy_vecs, move_lists)], values
+
+
+class TestMCTS(unittest.TestCase):
+    def setUp(self):
+        self.board = Board(width=7, height=7)
+        for move in [24, 25, 17, 31]:
+            self.board.play(move)
+
+    def makeMCTS(self, tree_backend="node"):
+        return MCTS(MCTS_expand_policy_fn, rollout_policy_fn,
+                    weight_c=5, compute_budget=200, silent=True,
+                    tree_backend=tree_backend)
+
+    def test_getMove_keeps_board(self):
+        error_report = "Got error in getMove"
+        moved = list(self.board.moved)
+        availables = list(self.board.availables)
+        zobrist_hash = self.board.zobrist_hash
+        self.makeMCTS().getMove(self.board)
+        self.assertListEqual(self.board.moved, moved, error_report + " -> moved")
+        self.assertListEqual(self.board.availables, availables, error_report + " -> availables")
+        self.assertEqual(self.board.zobrist_hash, zobrist_hash, error_report + " -> hash")
+        self.assertEqual(self.board.last_move, 31, error_report + " -> last move")
+
+    def test_playout_without_copy(self):
+        error_report = "Got error in playout"
+        np.random.seed(0)
+        search_tree = self.makeMCTS()
+        move = search_tree.getMove(self.board)
+
+        np.random.seed(0)
+        copy_search_tree = self.makeMCTS()
+        for _ in range(200):
+            copy_search_tree._playout(copy.deepcopy(self.board))
+        self.assertListEqual(root_visits(search_tree), root_visits(copy_search_tree), error_report)
+        self.assertEqual(move, max(copy_search_tree.root.children.items(),
+                                   key=lambda act_node: act_node[1].vis_times)[0], error_report)
+
+    def test_array_tree(self):
+        error_report = "Got error in array tree"
+        results = []
+        for tree_backend in ("node", "array"):
+            np.random.seed(0)
+            board = copy.deepcopy(self.board)
+            search_tree = self.makeMCTS(tree_backend)
+            result = []
+            for _ in range(3):
+                move = search_tree.getMove(board)
+                result.append((move, sorted(search_tree._tree.rootChildren())))
+                # keep the subtree of our move, then of the reply
+                search_tree.updateWithMove(move)
+                board.play(move)
+                reply = board.availables[0]
+                search_tree.updateWithMove(reply)
+                board.play(reply)
+            results.append(result)
+        self.assertListEqual(results[0], results[1], error_report)
+
+    def test_lazy_children(self):
+        error_report = "Got error in lazy children"
+        search_tree = self.makeMCTS()
+        search_tree.getMove(self.board)
+        visits = search_tree._tree.rootChildren()
+        self.assertListEqual(sorted(act for act, _ in visits), sorted(self.board.availables),
+                             error_report + " -> root children")
+        self.assertListEqual(sorted(search_tree.root.children),
+                             sorted(act for act, vis in visits if vis > 0),
+                             error_report + " -> only visited children are created")
+        for act, vis in visits:
+            if vis > 0:
+                self.assertEqual(search_tree.root.children[act].vis_times, vis, error_report)
+
+    def test_batch_playout(self):
+        error_report = "Got error in batch playout"
+        network = LinearNetwork(7, 7)
+        results = []
+        for tree_backend in ("node", "array"):
+            for batch_size in (1, 8):
+                search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=100, expand_bound=1,
+                                          silent=True, tree_backend=tree_backend, batch_size=batch_size,
+                                          policy_value_batch_fn=network.policyValueBatchFunc)
+                acts, probs = search_tree.getMove(self.board, 1.0)
+                visits = search_tree._tree.rootChildren()
+                self.assertEqual(search_tree._tree.visTimes(search_tree.root), 100, error_report)
+                results.append(visits)
+                if tree_backend == "node":
+                    self.assertEqual(search_tree.root._virtual_loss, 0,
+                                     error_report + " -> virtual loss left")
+        self.assertListEqual(results[0], results[2], error_report + " -> backends")
+        self.assertListEqual(results[1], results[3], error_report + " -> backends")
+        self.assertNotEqual(results[0], results[1], error_report + " -> batch")
+        self.assertRaises(ValueError, MCTSWithDNN, network.policyValueFunc, batch_size=8)
+
+    def test_transposition_table(self):
+        error_report = "Got error in transposition table"
+        table = TranspositionTable(4)
+        self.assertIsNone(table.lookup(1), error_report)
+        table.store(1, "a")
+        table.store(2, "b")
+        self.assertEqual(table.lookup(1), "a", error_report)
+        table.store(5, "c")  # same slot as 1
+        self.assertIsNone(table.lookup(1), error_report + " -> replacement")
+        self.assertEqual(table.lookup(5), "c", error_report)
+        self.assertEqual((table.lookups, table.hits, table.stores, table.replacements), (4, 2, 3, 1),
+                         error_report + " -> counters")
+        self.assertAlmostEqual(table.hit_rate, 0.5, msg=error_report)
+        table.clear()
+        self.assertEqual((table.lookups, table.hit_rate), (0, 0.0), error_report + " -> clear")
+
+    def test_transposition_search(self):
+        error_report = "Got error in search with transposition table"
+        start = Board(width=5, height=5)
+        start.play(12)
+        num_calls = []
+        for transposition_size in (0, 1 << 12):
+            network = LinearNetwork(5, 5)
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=1000, expand_bound=1,
+                                      silent=True, transposition_size=transposition_size)
+            board = copy.deepcopy(start)
+            search_tree.getMove(board, 1.0)
+            self.assertListEqual(board.moved, start.moved, error_report + " -> board changed")
+            self.assertEqual(search_tree.root.vis_times, 1000, error_report)
+            num_calls.append(network.num_calls)
+        self.assertGreater(search_tree.transposition_table.hits, 0,
+                           error_report + " -> no transposition found")
+        self.assertLess(num_calls[1], num_calls[0], error_report + " -> network calls")
+        self.assertRaises(ValueError, MCTSWithDNN, network.policyValueFunc,
+                          tree_backend="array", transposition_size=16)
+
+        np.random.seed(0)
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=1000,
+                           silent=True, transposition_size=1 << 12)
+        board = copy.deepcopy(start)
+        search_tree.getMove(board)
+        self.assertListEqual(board.moved, start.moved, error_report + " -> board changed")
+        self.assertEqual(search_tree.root.vis_times, 1000, error_report)
+        self.assertGreater(search_tree.transposition_table.hits, 0, error_report)
+
+    def test_transposition_table_after_move(self):
+        error_report = "Got error in transposition table after a move"
+        np.random.seed(0)
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=2000,
+                           silent=True, fast_rollout=True, transposition_size=1 << 12)
+        board = copy.deepcopy(self.board)
+        for _ in range(2):
+            move = search_tree.getMove(board)
+            search_tree.updateWithMove(move)
+            board.play(move)
+            live = set()
+            stack = [search_tree.root]
+            while stack:
+                node = stack.pop()
+                if id(node) not in live:
+                    live.add(id(node))
+                    stack.extend(node.children.values())
+            nodes = search_tree.transposition_table.nodes()
+            self.assertTrue(all(id(node) in live for node in nodes), error_report + " -> stale entry")
+        # a move outside the tree drops every entry
+        search_tree.updateWithMove(-1)
+        self.assertListEqual(search_tree.transposition_table.nodes(), [], error_report + " -> rebuild")
+
+    def test_time_limit(self):
+        error_report = "Got error in search with time limit"
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=10**6, silent=True)
+        board = copy.deepcopy(self.board)
+        start = time.time()
+        search_tree.getMove(board, time_limit=100)
+        self.assertLess(time.time() - start, 0.5, error_report)
+        self.assertListEqual(board.moved, self.board.moved, error_report + " -> board changed")
+        self.assertGreater(search_tree.root.vis_times, 0, error_report)
+
+        network = LinearNetwork(7, 7)
+        for batch_size in (1, 8):
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=10**6, silent=True,
+                                      batch_size=batch_size, policy_value_batch_fn=network.policyValueBatchFunc)
+            start = time.time()
+            acts, probs = search_tree.getMove(self.board, 1.0, time_limit=100)
+            self.assertLess(time.time() - start, 0.5, error_report)
+            self.assertEqual(len(acts), len(self.board.availables), error_report)
+
+    def test_early_stop(self):
+        error_report = "Got error in early stop"
+        network = LinearNetwork(7, 7)
+        for tree_backend in ("node", "array"):
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=2000, expand_bound=1,
+                                      silent=True, tree_backend=tree_backend, early_stop=True)
+            full_search = MCTSWithDNN(network.policyValueFunc, compute_budget=2000, expand_bound=1,
+                                      silent=True, tree_backend=tree_backend)
+            num_done = search_tree._runPlayouts(self.board, 2000)
+            full_search._runPlayouts(self.board, 2000)
+            self.assertLess(num_done, 2000, error_report + " -> no early stop")
+            visits = search_tree._tree.rootChildren()
+            best = max(visits, key=lambda act_vis: act_vis[1])
+            second = max(vis for act, vis in visits if act != best[0])
+            self.assertGreater(best[1] - second, 2000 - num_done, error_report + " -> stopped too early")
+            self.assertEqual(best[0], max(full_search._tree.rootChildren(), key=lambda act_vis: act_vis[1])[0],
+                             error_report + " -> best move changed")
+
+    def test_num_rollouts(self):
+        error_report = "Got error in MCTS with num_rollouts"
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=200,
+                           silent=True, num_rollouts=8)
+        board = copy.deepcopy(self.board)
+        move = search_tree.getMove(board)
+        self.assertListEqual(board.moved, self.board.moved, error_report + " -> board changed")
+        self.assertIn(move, self.board.availables, error_report)
+        self.assertEqual(search_tree.root.vis_times, 200, error_report)
+
+    def test_fast_rollout(self):
+        error_report = "Got error in MCTS with fast_rollout"
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=200,
+                           silent=True, fast_rollout=True)
+        board = copy.deepcopy(self.board)
+        move = search_tree.getMove(board)
+        self.assertListEqual(board.moved, self.board.moved, error_report + " -> board changed")
+        self.assertIn(move, self.board.availables, error_report)
+        self.assertEqual(search_tree.root.vis_times, 200, error_report)
+
+    def test_max_nodes(self):
+        error_report = "Got error in search with max_nodes"
+        network = LinearNetwork(7, 7)
+        num_nodes = []
+        for tree_backend in ("node", "array"):
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=500, expand_bound=1,
+                                      silent=True, tree_backend=tree_backend)
+            search_tree.getMove(self.board, 1.0)
+            num_nodes.append(search_tree.num_nodes)
+        self.assertEqual(num_nodes[0], num_nodes[1], error_report + " -> node count")
+
+        for tree_backend in ("node", "array"):
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=500, expand_bound=1,
+                                      silent=True, tree_backend=tree_backend, max_nodes=2000)
+            board = copy.deepcopy(self.board)
+            search_tree.getMove(board, 1.0)
+            self.assertListEqual(board.moved, self.board.moved, error_report + " -> board changed")
+            self.assertLessEqual(search_tree.num_nodes, 2000, error_report)
+            self.assertGreater(search_tree.num_pruned_nodes, 0, error_report + " -> not pruned")
+            visits = search_tree._tree.rootChildren()
+            # the root is evaluated twice before it is expanded
+            self.assertEqual(search_tree._tree.visTimes(search_tree.root), 500, error_report)
+            self.assertEqual(sum(vis for _, vis in visits), 498, error_report + " -> root visits")
+            # the pruned tree can still be searched and reused
+            search_tree.updateWithMove(max(visits, key=lambda act_vis: act_vis[1])[0])
+            self.assertLessEqual(search_tree.num_nodes, 2000, error_report)
+
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=300,
+                           silent=True, fast_rollout=True, max_bytes=100 * 1024)
+        search_tree.getMove(self.board)
+        self.assertLessEqual(search_tree.num_nodes * search_tree._tree.kNodeBytes, 100 * 1024, error_report)
+        self.assertGreater(search_tree.num_pruned_nodes, 0, error_report + " -> not pruned")
+
+    def test_progressive_widening(self):
+        error_report = "Got error in search with progressive widening"
+        network = LinearNetwork(7, 7)
+        policy, _ = network.policyValueFunc(self.board)
+        top_moves = sorted(policy, key=lambda act_prob: -act_prob[1])
+        for widen_rate, max_width in ((0.0, 3), (1.0, 3 + int(500 ** 0.5))):
+            num_nodes = []
+            for top_k in (None, 3):
+                search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=500, expand_bound=1,
+                                          silent=True, top_k=top_k, widen_rate=widen_rate)
+                search_tree.getMove(self.board, 1.0)
+                num_nodes.append(search_tree.num_nodes)
+            # the tree only keeps the opened children
+            self.assertLess(num_nodes[1], num_nodes[0] // 2, error_report + " -> num_nodes")
+            visited = [act for act, vis in search_tree._tree.rootChildren() if vis > 0]
+            self.assertLessEqual(len(visited), max_width, error_report)
+            # the widened children are the ones with the highest priors
+            self.assertSetEqual(set(visited), set(act for act, _ in top_moves[:len(visited)]), error_report)
+        self.assertGreater(len(visited), 3, error_report + " -> not widened")
+        self.assertRaises(ValueError, MCTSWithDNN, network.policyValueFunc,
+                          tree_backend="array", top_k=3)
+
+    def test_search_stats(self):
+        error_report = "Got error in search statistics"
+        search_tree = self.makeMCTS()
+        search_tree.getMove(self.board)
+        self.assertIsNone(search_tree.stats, error_report + " -> collected when off")
+
+        collected = []
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=200,
+                           silent=True, stats_callback=collected.append)
+        search_tree.getMove(self.board)
+        stats = search_tree.stats
+        self.assertListEqual(collected, [stats], error_report + " -> callback")
+        self.assertEqual(stats.num_playouts, 200, error_report)
+        self.assertEqual(stats.num_nodes, search_tree.num_nodes, error_report)
+        self.assertEqual(stats.nodes_created, search_tree.num_nodes - 1, error_report)
+        self.assertGreaterEqual(stats.max_depth, stats.mean_depth, error_report)
+        self.assertGreater(stats.mean_depth, 0, error_report)
+        self.assertGreater(stats.phase_times["rollout"], 0, error_report)
+        self.assertLessEqual(sum(stats.phase_times.values()), stats.elapsed, error_report)
+
+        network = LinearNetwork(7, 7)
+        for batch_size in (1, 8):
+            search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=200, expand_bound=1,
+                                      silent=True, batch_size=batch_size, collect_stats=True,
+                                      policy_value_batch_fn=network.policyValueBatchFunc)
+            search_tree.getMove(self.board, 1.0)
+            stats = search_tree.stats
+            self.assertEqual(stats.num_playouts, 200, error_report)
+            self.assertEqual(stats.phase_times["rollout"], 0, error_report)
+            self.assertGreater(stats.phase_times["evaluate"], 0, error_report)
+            self.assertGreater(stats.playouts_per_second, 0, error_report)
+
+    def test_solver(self):
+        error_report = "Got error in search with solver"
+        # black has four in a row with both ends open
+        board = Board(width=7, height=7)
+        for move in [22, 0, 23, 6, 24, 42, 25]:
+            board.play(move)
+        lost_visits = []
+        for tree_backend in ("node", "array"):
+            np.random.seed(0)
+            search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=8000, silent=True,
+                               fast_rollout=True, tree_backend=tree_backend, solver=True,
+                               collect_stats=True)
+            search_tree.getMove(board)
+            # every move of white loses
+            self.assertEqual(search_tree._tree.proven(search_tree.root), 1, error_report + " -> loss")
+            self.assertLess(search_tree.stats.num_playouts, 8000, error_report + " -> not stopped")
+            lost_visits.append(sorted(search_tree._tree.rootChildren()))
+        self.assertListEqual(lost_visits[0], lost_visits[1], error_report + " -> backends differ")
+
+        board.play(48)
+        for tree_backend in ("node", "array"):
+            search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=2000, silent=True,
+                               fast_rollout=True, tree_backend=tree_backend, solver=True,
+                               collect_stats=True)
+            self.assertIn(search_tree.getMove(board), (21, 26), error_report)
+            self.assertLess(search_tree.stats.num_playouts, 2000, error_report + " -> not stopped")
+            # the proven win is played without searching again
+            stats = search_tree.stats
+            self.assertEqual(search_tree.getMove(board), search_tree._tree.winningMove(), error_report)
+            self.assertIs(search_tree.stats, stats, error_report + " -> searched again")
+
+        network = LinearNetwork(7, 7)
+        search_tree = MCTSWithDNN(network.policyValueFunc, compute_budget=2000, expand_bound=1,
+                                  silent=True, solver=True)
+        acts, probs = search_tree.getMove(board, 1.0)
+        self.assertIn(acts[int(np.argmax(probs))], (21, 26), error_report)
+        self.assertEqual(np.max(probs), 1.0, error_report + " -> not played for sure")
+
+    def test_pondering(self):
+        error_report = "Got error in pondering"
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, compute_budget=300,
+                           silent=True, fast_rollout=True, count_reused=True)
+        board = copy.deepcopy(self.board)
+        search_tree.startPondering(board)
+        self.assertTrue(search_tree.pondering, error_report)
+        time.sleep(0.05)
+        num_playouts = search_tree.stopPondering()
+        self.assertFalse(search_tree.pondering, error_report)
+        self.assertGreater(num_playouts, 0, error_report)
+        self.assertEqual(search_tree.root.vis_times, num_playouts, error_report)
+        self.assertListEqual(board.moved, self.board.moved, error_report + " -> board changed")
+
+        # the budget is reached and pondering stops by itself
+        search_tree.startPondering(board)
+        search_tree._ponder_thread.join()
+        self.assertEqual(search_tree.root.vis_times, num_playouts + 300, error_report)
+
+        # the opponent's move keeps its subtree, which counts toward the budget
+        move = max(search_tree.testOut(), key=lambda act_vis: act_vis[1])[0]
+        search_tree.startPondering(board)
+        search_tree.updateWithMove(move)
+        self.assertFalse(search_tree.pondering, error_report + " -> updateWithMove")
+        reused = search_tree.root.vis_times
+        self.assertGreater(reused, 0, error_report + " -> subtree not kept")
+        board.play(move)
+        search_tree.getMove(board)
+        self.assertEqual(search_tree.root.vis_times, max(reused + 1, 300), error_report + " -> budget")
@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+
+from pygomoku.Board import Board
+from pygomoku.mcts.MCTS import MCTS
+from pygomoku.mcts.ParallelMCTS import RootParallelMCTS, TreeParallelMCTS
+from pygomoku.mcts.policy_fn import rollout_policy_fn, MCTS_expand_policy_fn
+from pygomoku_test.MCTS_test import LinearNetwork
+
+
+class TestRootParallelMCTS(unittest.TestCase):
+    def setUp(self):
+        self.board = Board(width=7, height=7)
+        for move in [24, 25, 17, 31]:
+            self.board.play(move)
+        self.search_tree = RootParallelMCTS(MCTS_expand_policy_fn, rollout_policy_fn,
+                                            compute_budget=50, silent=True,
+                                            num_workers=2, seed=5)
+
+    def tearDown(self):
+        self.search_tree.close()
+
+    def test_summed_visits(self):
+        error_report = "Got error in root parallel search"
+        # one tree and one random stream per worker
+        local_trees, random_states = [], []
+        for seed in (5, 6):
+            local_trees.append(MCTS(MCTS_expand_policy_fn, rollout_policy_fn,
+                                    compute_budget=50, silent=True))
+            random_states.append(np.random.RandomState(seed).get_state())
+
+        for move in (None, 32, 23):
+            if move is not None:
+                # every tree keeps its subtree of the move
+                self.board.play(move)
+                self.search_tree.updateWithMove(move)
+                for local_tree in local_trees:
+                    local_tree.updateWithMove(move)
+            visits = self.search_tree._search(self.board, 50)
+            expect = {}
+            for i, local_tree in enumerate(local_trees):
+                np.random.set_state(random_states[i])
+                for _ in range(50):
+                    local_tree._playout(self.board)
+                random_states[i] = np.random.get_state()
+                for action, vis_times in local_tree._tree.rootChildren():
+                    expect[action] = expect.get(action, 0) + vis_times
+            self.assertDictEqual(visits, expect, error_report)
+            self.assertEqual(self.search_tree.num_nodes,
+                             sum(local_tree.num_nodes for local_tree in local_trees),
+                             error_report + " -> num_nodes")
+            self.assertEqual(self.search_tree.num_pruned_nodes, 0, error_report + " -> num_pruned_nodes")
+
+    def test_getMove(self):
+        error_report = "Got error in root parallel getMove"
+        move = self.search_tree.getMove(self.board)
+        self.assertTrue(self.board.isValidMove(move), error_report)
+        self.assertEqual(len(self.search_tree._workers), 2, error_report)
+        self.search_tree.close()
+        self.assertEqual(len(self.search_tree._workers), 0, error_report + " -> close")
+
+
+class TestTreeParallelMCTS(unittest.TestCase):
+    def test_getMove(self):
+        error_report = "Got error in tree parallel search"
+        board = Board(width=7, height=7)
+        for move in [24, 25, 17, 31]:
+            board.play(move)
+        moved = list(board.moved)
+        network = LinearNetwork(7, 7)
+        for tree_backend in ("node", "array"):
+            search_tree = TreeParallelMCTS(network.policyValueFunc, compute_budget=200, expand_bound=1,
+                                           silent=True, tree_backend=tree_backend, num_threads=4)
+            acts, probs = search_tree.getMove(board, 1.0)
+            self.assertListEqual(board.moved, moved, error_report + " -> board changed")
+            self.assertEqual(search_tree._tree.visTimes(search_tree.root), 200, error_report)
+            # threads starting before the root is expanded evaluate the root itself
+            self.assertGreaterEqual(sum(vis for _, vis in search_tree._tree.rootChildren()), 196, error_report)
+            self.assertAlmostEqual(float(np.sum(probs)), 1.0, msg=error_report)
+            if tree_backend == "node":
+                self.assertEqual(search_tree.root._virtual_loss, 0, error_report + " -> virtual loss left")
+        self.assertRaises(ValueError, TreeParallelMCTS, network.policyValueFunc,
+                          tree_backend="array", top_k=3)
@@ -2,6 +2,8 @@ import unittest
 import inspect
 from pygomoku import Player
 from pygomoku.Board import Board
+from pygomoku.GameServer import GameServer
+from pygomoku_test import MCTS_test
 
 class TestGomokuHumanPlayer(unittest.TestCase):
     def setUp(self):
@@ -17,3 +19,44 @@ class TestGomokuHumanPlayer(unittest.TestCase):
         self.assertEqual(self.player.name, Player.HumanPlayer.kDefaultName, 'Get error in {} when test name property.'.format(__file__))
         self.player.name = "Jack"
         self.assertEqual(self.player.name, "Jack", 'Get error in {} when test name property.'.format(__file__))
+
+
+class TestPureMCTSPlayer(unittest.TestCase):
+    def test_ponder(self):
+        black = Player.PureMCTSPlayer(Board.kPlayerBlack, compute_budget=50, silent=True,
+                                      fast_rollout=True, ponder=True)
+        white = Player.PureMCTSPlayer(Board.kPlayerWhite, compute_budget=50, silent=True,
+                                      fast_rollout=True)
+        board = Board(width=7, height=7)
+        GameServer(board, GameServer.kNormalPlayGame, black, white, silent=True).startGame()
+        self.assertTrue(board.gameEnd()[0], 'Get error in {} when test pondering.'.format(__file__))
+        self.assertFalse(black._search_tree.pondering, 'Get error in {} when test pondering.'.format(__file__))
+
+    def test_close(self):
+        error_report = 'Get error in {} when test close.'.format(__file__)
+        player = Player.PureMCTSPlayer(Board.kPlayerBlack, compute_budget=20, silent=True,
+                                       fast_rollout=True, num_workers=2)
+        board = Board(width=7, height=7)
+        board.play(24)
+        board.play(25)
+        self.assertTrue(board.isValidMove(player.getAction(board)), error_report)
+        processes = [process for process, _ in player._search_tree._workers]
+        self.assertEqual(len(processes), 2, error_report)
+        player.close()
+        self.assertFalse(any(process.is_alive() for process in processes), error_report)
+        self.assertListEqual(player._search_tree._workers, [], error_report)
+
+
+class TestDNNMCTSPlayer(unittest.TestCase):
+    def test_self_play(self):
+        error_report = 'Get error in {} when test self_play property.'.format(__file__)
+        network = MCTS_test.LinearNetwork(7, 7)
+        network.width = network.height = 7
+        player = Player.DNNMCTSPlayer(Board.kPlayerBlack, network, silent=True,
+                                      early_stop=True, solver=True, ponder=True)
+        search_tree = player._search_tree
+        self.assertTrue(search_tree.early_stop and search_tree.solver and search_tree.count_reused, error_report)
+        player.self_play = True
+        self.assertFalse(search_tree.early_stop or search_tree.solver or search_tree.count_reused, error_report)
+        player.self_play = False
+        self.assertTrue(search_tree.early_stop and search_tree.solver and search_tree.count_reused, error_report)
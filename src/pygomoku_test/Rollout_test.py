@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from pygomoku.Board import Board
+from pygomoku.mcts.MCTS import MCTS, rewind
+from pygomoku.mcts.Rollout import batchRollout, shuffledRollout
+from pygomoku.mcts.policy_fn import rollout_policy_fn, MCTS_expand_policy_fn
+
+
+class TestRollout(unittest.TestCase):
+    def test_game_end(self):
+        error_report = "Got error in batchRollout at the end of the game"
+        board = Board(width=7, height=7)
+        for move in [0, 7, 1, 8, 2, 9, 3, 10, 4]:
+            board.play(move)
+        self.assertListEqual(batchRollout(board, 4).tolist(), [-1.0] * 4, error_report)
+        self.assertEqual(shuffledRollout(board), -1, error_report)
+
+    def test_one_move_left(self):
+        error_report = "Got error in batchRollout with one move left"
+        # the current player (black) plays the last empty position,
+        # which completes the top row
+        board = Board(width=5, height=5)
+        black = [0, 1, 2, 3, 6, 8, 11, 13, 17, 18, 21, 23]
+        white = [5, 7, 9, 10, 12, 14, 15, 16, 19, 20, 22, 24]
+        for black_move, white_move in zip(black, white):
+            board.play(black_move)
+            board.play(white_move)
+        self.assertFalse(board.gameEnd()[0], error_report + " -> bad test position")
+        self.assertListEqual(batchRollout(board, 3).tolist(), [1.0] * 3, error_report)
+        self.assertEqual(len(board.moved), 24, error_report + " -> board changed")
+        self.assertEqual(shuffledRollout(board), 1, error_report)
+        self.assertEqual(board.moved[-1], 4, error_report)
+
+    def test_same_outcomes(self):
+        error_report = "Got error in batchRollout: outcomes differ from rollouts on board"
+        np.random.seed(0)
+        board = Board(width=7, height=7)
+        for move in [24, 25, 17, 31, 10, 32, 3, 33]:
+            board.play(move)
+        search_tree = MCTS(MCTS_expand_policy_fn, rollout_policy_fn, silent=True)
+        outcomes = []
+        for _ in range(2000):
+            outcomes.append(search_tree._evaluateRollout(board))
+            rewind(board, 8)
+        outcomes = np.array(outcomes)
+        batch_outcomes = batchRollout(board, 2000)
+        shuffled_outcomes = []
+        for _ in range(2000):
+            shuffled_outcomes.append(shuffledRollout(board))
+            rewind(board, 8)
+        shuffled_outcomes = np.array(shuffled_outcomes)
+        for value in (-1, 0, 1):
+            self.assertAlmostEqual(np.mean(outcomes == value), np.mean(batch_outcomes == value),
+                                   delta=0.05, msg=error_report)
+            self.assertAlmostEqual(np.mean(outcomes == value), np.mean(shuffled_outcomes == value),
+                                   delta=0.05, msg=error_report + " -> shuffled")
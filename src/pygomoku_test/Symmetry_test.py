@@ -0,0 +1,63 @@
+import unittest
+
+import numpy as np
+
+from pygomoku.Board import Board
+from pygomoku.Symmetry import (Symmetry, getSymmetryTables, transformMove,
+                               transformPlanes, transformPolicy)
+
+
+class TestSymmetry(unittest.TestCase):
+    def test_getSymmetryTables(self):
+        error_report = "Got error in getSymmetryTables"
+        transforms, move_maps = getSymmetryTables(4, 4)
+        self.assertEqual(len(transforms), Symmetry.kNumTransforms, error_report)
+        for move_map in move_maps:
+            self.assertListEqual(sorted(move_map.tolist()), list(range(16)),
+                                 error_report + " -> not a permutation")
+        # the top left corner goes to the bottom left after a rotation
+        self.assertEqual(transformMove(0, Symmetry.kRot90, 4, 4), 12, error_report)
+        self.assertEqual(transformMove(0, Symmetry.kFlip, 4, 4), 3, error_report)
+        self.assertEqual(transformMove(12, Symmetry.kRot90, 4, 4, inverse=True), 0,
+                         error_report + " -> inverse")
+
+        transforms, _ = getSymmetryTables(5, 7)
+        self.assertListEqual(transforms, [0, 2, 4, 6], error_report + " -> non-square")
+        self.assertRaises(ValueError, transformMove, 0, Symmetry.kRot90, 5, 7)
+
+    def test_transformPolicy(self):
+        error_report = "Got error in transformPolicy"
+        policy = np.random.rand(5 * 7)
+        for transform in getSymmetryTables(5, 7)[0]:
+            result = transformPolicy(policy, transform, 5, 7)
+            self.assertTrue(np.array_equal(
+                result, transformPlanes(policy.reshape(5, 7), transform).reshape(-1)), error_report)
+            self.assertTrue(np.array_equal(
+                transformPolicy(result, transform, 5, 7, inverse=True), policy),
+                error_report + " -> inverse")
+
+    def test_canonical(self):
+        error_report = "Got error in canonical"
+        np.random.seed(0)
+        moves = np.random.permutation(81)[:11].tolist()
+        board = Board(width=9, height=9)
+        for move in moves:
+            board.play(move)
+        canonical_hash, canonical_transform = board.canonical()
+
+        for transform in range(Symmetry.kNumTransforms):
+            symmetric_board = Board(width=9, height=9)
+            for move in moves:
+                symmetric_board.play(transformMove(move, transform, 9, 9))
+            self.assertTrue(np.array_equal(symmetric_board.currentState(),
+                                           transformPlanes(board.currentState(), transform)),
+                            error_report + " -> transformPlanes")
+            self.assertEqual(symmetric_board.canonical()[0], canonical_hash, error_report)
+
+        canonical_board = Board(width=9, height=9)
+        for move in moves:
+            canonical_board.play(transformMove(move, canonical_transform, 9, 9))
+        self.assertEqual(canonical_board.zobrist_hash, canonical_hash,
+                         error_report + " -> canonical frame")
+        self.assertEqual(Board().canonical(), (Board().zobrist_hash, Symmetry.kIdentity),
+                         error_report + " -> empty board")
@@ -0,0 +1,34 @@
+import unittest
+
+from pygomoku.Board import Board
+from pygomoku.mcts.TimeManager import TimeManager
+
+
+class TestTimeManager(unittest.TestCase):
+    def test_moveTime(self):
+        error_report = "Got error in TimeManager"
+        board = Board(width=9, height=9)
+        time_manager = TimeManager(10000, moves_to_go=20)
+        self.assertAlmostEqual(time_manager.moveTime(board), 500, msg=error_report)
+        time_manager.update(1000)
+        self.assertAlmostEqual(time_manager.remaining, 9000, msg=error_report)
+        self.assertAlmostEqual(time_manager.moveTime(board), 450, msg=error_report)
+        time_manager.update(10000)
+        self.assertEqual(time_manager.remaining, 0, error_report)
+        self.assertEqual(time_manager.moveTime(board), 0, error_report)
+        time_manager.reset()
+        self.assertEqual(time_manager.remaining, 10000, error_report + " -> reset")
+
+    def test_safety_margin(self):
+        error_report = "Got error in TimeManager safety margin"
+        board = Board(width=9, height=9)
+        time_manager = TimeManager(1000, moves_to_go=1, safety_margin=20)
+        self.assertAlmostEqual(time_manager.moveTime(board), 980, msg=error_report)
+
+    def test_increment(self):
+        error_report = "Got error in TimeManager increment"
+        board = Board(width=9, height=9)
+        time_manager = TimeManager(1000, increment=100, moves_to_go=10)
+        self.assertAlmostEqual(time_manager.moveTime(board), 200, msg=error_report)
+        time_manager.update(200)
+        self.assertAlmostEqual(time_manager.remaining, 900, msg=error_report)